@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager, redirect_stdout
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "review"))
+
+from code_reviewer import CodeReviewAgent, RuleEngine, REVIEW_RULES
+from auto_fixer import AutoFixer
+from python_analyzer import analyze_python
+from synthetic_repo import generate_repository, parse_language_mix
+
+SCENARIOS = {
+    "small": {"files": 50, "lines": 200, "hit_density": 0.02},
+    "many-files": {"files": 500, "lines": 200, "hit_density": 0.02},
+    "large-files": {"files": 20, "lines": 5000, "hit_density": 0.02},
+    "dense-findings": {"files": 100, "lines": 200, "hit_density": 0.3},
+}
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_THRESHOLD = 1.5
+# これより短い計測値の差はノイズとして回帰判定から除外する（秒）
+MIN_REGRESSION_DELTA = 0.005
+
+
+@contextmanager
+def _working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class ReviewBenchmark:
+    def __init__(self, scenarios, repeat=3, jobs=1):
+        self.scenarios = scenarios
+        self.repeat = max(1, repeat)
+        self.jobs = jobs
+        self.results = {}
+    
+    def run(self):
+        for name, params in self.scenarios.items():
+            print(f"⏱️  {name}: {params['files']} files × {params['lines']} lines, hit density {params['hit_density']}")
+            self.results[name] = self._run_scenario(params)
+        return self.results
+    
+    def _best_of(self, func, setup=None):
+        best = None
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    
+    def _run_scenario(self, params):
+        timings = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo_root = Path(temp_dir) / "repo"
+            files = generate_repository(repo_root, params["files"], params["lines"],
+                                        params.get("mix"), params["hit_density"])
+            _check_python_sources(repo_root, files)
+            
+            with _working_directory(repo_root), redirect_stdout(io.StringIO()):
+                agents = []
+                
+                def review():
+                    agent = CodeReviewAgent("benchmark", list(files), jobs=self.jobs)
+                    agent.run_review()
+                    agents.append(agent)
+                
+                timings["run_review"] = self._best_of(review)
+                agent = agents[-1]
+                timings["generate_report"] = self._best_of(agent._generate_report)
+                
+                contents = [(path, CodeReviewAgent._read_file(path)) for path in files]
+                python_contents = [content for path, content in contents if path.endswith(".py")]
+                timings["python_ast"] = self._best_of(lambda: [analyze_python(c) for c in python_contents])
+                
+                # 単一ルールのエンジンで計測する（ast ルールは構文解析の時間を含む）
+                for rule in REVIEW_RULES:
+                    engine = RuleEngine([rule])
+                    timings[f"rule:{rule['id']}"] = self._best_of(
+                        lambda: [engine.evaluate(path, content) for path, content in contents]
+                    )
+                
+                report_name = next(Path("review-reports").glob("review-benchmark-*.md")).name
+            
+            timings["auto_fixer"] = self._time_auto_fixer(repo_root, Path(temp_dir) / "fix", report_name)
+            timings["findings"] = sum(len(v) for v in agent.findings.values())
+        
+        return timings
+    
+    def _time_auto_fixer(self, repo_root, fix_root, report_name):
+        # AutoFixer はファイルを書き換えるため、毎回コピーしたworktreeで計測する
+        def reset():
+            shutil.rmtree(fix_root, ignore_errors=True)
+            shutil.copytree(repo_root, fix_root)
+        
+        def fix():
+            with _working_directory(fix_root), redirect_stdout(io.StringIO()):
+                AutoFixer(str(Path("review-reports") / report_name)).run()
+        
+        return self._best_of(fix, setup=reset)
+
+
+def _check_python_sources(repo_root, files):
+    # 構文エラーのファイルは正規表現へのフォールバックしか計測しないため、ASTの計測として無効
+    invalid = []
+    for path in files:
+        if path.endswith(".py"):
+            try:
+                # ast.parse は関数外の return を通すため、compile で構文を検査する
+                compile((repo_root / path).read_text(encoding='utf-8'), path, "exec", dont_inherit=True)
+            except SyntaxError as e:
+                invalid.append(f"{path}:{e.lineno}")
+    if invalid:
+        raise RuntimeError(f"生成したPythonファイルが構文解析できません: {', '.join(invalid[:5])}"
+                           + (f" ほか{len(invalid) - 5}件" if len(invalid) > 5 else ""))
+
+
+def compare_with_baseline(results, baseline, threshold):
+    regressions = []
+    for scenario, timings in results.items():
+        baseline_timings = baseline.get("scenarios", {}).get(scenario, {})
+        for metric, value in timings.items():
+            if metric == "findings" or metric not in baseline_timings:
+                continue
+            previous = baseline_timings[metric]
+            if value > previous * threshold and value - previous > MIN_REGRESSION_DELTA:
+                regressions.append((scenario, metric, previous, value))
+    return regressions
+
+
+def print_results(results):
+    for scenario, timings in results.items():
+        print(f"\n## {scenario} (findings: {timings['findings']})")
+        for metric, value in sorted(timings.items(), key=lambda item: item[0]):
+            if metric != "findings":
+                print(f"  {metric:<32} {value * 1000:10.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="レビューパイプラインのベンチマークを実行します")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="実行するシナリオ（複数指定可、省略時は全シナリオ）")
+    parser.add_argument("--files", type=int, help="custom シナリオのファイル数（指定時のみ custom を実行）")
+    parser.add_argument("--lines", type=int, default=200, help="custom シナリオの1ファイルあたりの行数")
+    parser.add_argument("--hit-density", type=float, default=0.02, help="custom シナリオのルールヒット注入率")
+    parser.add_argument("--mix", type=parse_language_mix, help="custom シナリオの言語比率（例: py=0.6,js=0.4）")
+    parser.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数（最小値を採用）")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="run_review の並列ワーカー数")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"回帰とみなす倍率（デフォルト: ベースラインの値、なければ {DEFAULT_THRESHOLD}）")
+    parser.add_argument("--update-baseline", action="store_true", help="計測結果でベースラインを更新する")
+    parser.add_argument("--output", type=Path, help="計測結果をJSONで保存する")
+    args = parser.parse_args()
+    
+    scenarios = {name: SCENARIOS[name] for name in (args.scenario or ([] if args.files else SCENARIOS))}
+    if args.files:
+        scenarios["custom"] = {"files": args.files, "lines": args.lines, "hit_density": args.hit_density, "mix": args.mix}
+    
+    benchmark = ReviewBenchmark(scenarios, args.repeat, args.jobs)
+    try:
+        results = benchmark.run()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print_results(results)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    threshold = args.threshold or baseline.get("threshold", DEFAULT_THRESHOLD)
+    
+    if args.update_baseline:
+        scenarios = baseline.get("scenarios", {})
+        scenarios.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"threshold": threshold, "scenarios": scenarios}, f, indent=2)
+        print(f"\n📝 ベースラインを更新しました: {args.baseline}")
+        return
+    
+    if not baseline:
+        print(f"\n⚠️ ベースラインがありません（--update-baseline で作成）: {args.baseline}")
+        return
+    
+    regressions = compare_with_baseline(results, baseline, threshold)
+    if regressions:
+        print(f"\n❌ 性能回帰を検出しました（閾値 {threshold}x）:")
+        for scenario, metric, previous, value in regressions:
+            print(f"  - {scenario} / {metric}: {previous * 1000:.2f} ms → {value * 1000:.2f} ms")
+        sys.exit(1)
+    
+    print(f"\n✅ 性能回帰なし（閾値 {threshold}x）")
+
+
+if __name__ == "__main__":
+    main()
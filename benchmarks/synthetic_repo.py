@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import random
+import argparse
+from pathlib import Path
+
+DEFAULT_LANGUAGE_MIX = {
+    "py": 0.6,
+    "js": 0.3,
+    "html": 0.05,
+    "css": 0.05
+}
+
+FILLER_LINES = {
+    "py": [
+        "total = compute_total(values, offset=3)",
+        "result.append(item.name.strip())",
+        "logger.info(\"processed %s records\", len(records))",
+        "config = load_config(path)",
+        "if value is None:\n    value = default_value",
+    ],
+    "js": [
+        "const total = items.reduce((sum, item) => sum + item.price, 0);",
+        "element.classList.add('active');",
+        "fetchData(url).then(render);",
+        "let count = 0;",
+        "console.debug('rendered', count);",
+    ],
+    "html": [
+        "<div class=\"card\"><p>Lorem ipsum dolor sit amet</p></div>",
+        "<a href=\"/about\">About</a>",
+        "<span class=\"badge\">new</span>",
+    ],
+    "css": [
+        ".card { margin: 0 auto; padding: 8px; }",
+        "a:hover { color: #336699; }",
+        ".badge { font-weight: bold; }",
+    ]
+}
+
+# 各ルールに確実にヒットするスニペット（言語ごと）
+RULE_HITS = {
+    "py": [
+        "def ab():\n    pass",
+        "import hashlib\ndigest = hashlib.md5(data).hexdigest()",
+        "password = request.form['password']",
+        "value = eval(expression)",
+        "query = \"SELECT * FROM users WHERE id=\" + user_id",
+        "api_key = \"sk-test-000000\"",
+        "for row in rows:\n    for col in row:\n        total += col",
+        "for user in users:\n    db.query(user.id)",
+        "try:\n    run()\nexcept:\n    pass",
+        "handle = open(path)",
+        "class helper:\n    pass",
+    ],
+    "js": [
+        "const result = eval(input);",
+        "const q = \"SELECT name FROM users WHERE id=\" + id;",
+        "const apiKey = 'sk-test-000000';",
+    ],
+    "html": [
+        "<script>eval(window.name)</script>",
+    ],
+    "css": []
+}
+# 関数の中には書けないため、Pythonの関数と関数の間（モジュール直下）に注入するスニペット
+PY_MODULE_HITS = [
+    "from os import *",
+]
+
+
+def generate_repository(root, file_count=100, lines_per_file=200, language_mix=None,
+                        hit_density=0.02, seed=0):
+    # hit_density: 1行あたりにルールヒットを注入する確率
+    rng = random.Random(seed)
+    language_mix = language_mix or DEFAULT_LANGUAGE_MIX
+    languages = list(language_mix)
+    weights = [language_mix[language] for language in languages]
+    
+    root = Path(root)
+    paths = []
+    for index in range(file_count):
+        language = rng.choices(languages, weights)[0]
+        relative = Path(f"pkg{index % 10}") / f"module_{index}.{language}"
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        if language == "py":
+            lines = _python_module(rng, lines_per_file, hit_density)
+        else:
+            lines = []
+            while len(lines) < lines_per_file:
+                lines.extend(_pick_snippet(rng, language, hit_density))
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines[:lines_per_file]) + "\n")
+        paths.append(str(relative))
+    
+    return paths
+
+
+def _pick_snippet(rng, language, hit_density):
+    if RULE_HITS[language] and rng.random() < hit_density:
+        return rng.choice(RULE_HITS[language]).split("\n")
+    return rng.choice(FILLER_LINES[language]).split("\n")
+
+
+def _python_module(rng, lines_per_file, hit_density):
+    # AST解析が通る（構文エラーで正規表現にフォールバックしない）モジュールを生成する。
+    # 文は fn_N の本文として字下げし、return は各関数の末尾にだけ置く
+    single_lines = [line for line in FILLER_LINES["py"] if "\n" not in line]
+    # モジュール直下のヒットは全ヒットに占める種類数の割合で注入する
+    module_density = hit_density * len(PY_MODULE_HITS) / (len(PY_MODULE_HITS) + len(RULE_HITS["py"]))
+    lines = []
+    function_count = 0
+    while lines_per_file - len(lines) >= 3:
+        if rng.random() < module_density:
+            lines.append(rng.choice(PY_MODULE_HITS))
+            continue
+        
+        body_length = min(rng.randint(3, 18), lines_per_file - len(lines) - 2)
+        body = []
+        while len(body) < body_length:
+            snippet = _pick_snippet(rng, "py", hit_density)
+            if len(body) + len(snippet) > body_length:
+                snippet = [rng.choice(single_lines)]
+            body.extend(snippet)
+        
+        lines.append(f"def fn_{function_count}(values):")
+        lines.extend("    " + line for line in body)
+        lines.append("    return normalize(result)")
+        function_count += 1
+    
+    while len(lines) < lines_per_file:
+        lines.append(rng.choice(single_lines))
+    return lines
+
+
+def parse_language_mix(value):
+    mix = {}
+    for part in value.split(","):
+        language, weight = part.split("=")
+        if language not in FILLER_LINES:
+            raise argparse.ArgumentTypeError(f"unsupported language: {language}")
+        mix[language] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成worktreeを生成します")
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--mix", type=parse_language_mix, default=DEFAULT_LANGUAGE_MIX,
+                        help="言語比率（例: py=0.6,js=0.3,html=0.05,css=0.05）")
+    parser.add_argument("--hit-density", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    if os.path.exists(args.root) and os.listdir(args.root):
+        print(f"❌ 出力先が空ではありません: {args.root}")
+        sys.exit(1)
+    
+    paths = generate_repository(args.root, args.files, args.lines, args.mix, args.hit_density, args.seed)
+    print(f"✅ {len(paths)}ファイルを生成しました: {args.root}")
+
+
+if __name__ == "__main__":
+    main()
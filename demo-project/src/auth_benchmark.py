@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from user_auth import UserAuthentication
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# CIで短時間に終わるよう、本番（12）より低いコストを既定にする
+DEFAULT_COST = 4
+PERCENTILES = (50, 95, 99)
+
+
+class TimedAuthentication(UserAuthentication):
+    # bcrypt と SQLite の処理をラップして、それぞれの所要時間を積算する
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings = {"bcrypt": 0.0, "sqlite": 0.0}
+        self.timings_lock = threading.Lock()
+    
+    def _timed(self, category, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.timings_lock:
+                self.timings[category] += elapsed
+    
+    def reset_timings(self):
+        with self.timings_lock:
+            self.timings = {"bcrypt": 0.0, "sqlite": 0.0}
+    
+    def _hash_password(self, password):
+        return self._timed("bcrypt", super()._hash_password, password)
+    
+    def _check_password(self, password, hashed_password):
+        return self._timed("bcrypt", super()._check_password, password, hashed_password)
+    
+    def _insert_user(self, username, hashed_password, email):
+        return self._timed("sqlite", super()._insert_user, username, hashed_password, email)
+    
+    def _get_password_hash(self, username):
+        return self._timed("sqlite", super()._get_password_hash, username)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    # nearest-rank 法
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class AuthBenchmark:
+    def __init__(self, db_path, users=1000, operations=500, workers=8, login_ratio=0.8,
+                 cost=DEFAULT_COST, mode="thread", seed=0):
+        self.db_path = db_path
+        self.users = users
+        self.operations = operations
+        self.workers = workers
+        self.login_ratio = login_ratio
+        self.cost = cost
+        self.mode = mode
+        self.random = random.Random(seed)
+        # 既存のDBに対して実行しても衝突しないよう、実行ごとにユーザー名の接頭辞を変える
+        self.prefix = f"bench-{os.urandom(4).hex()}"
+        self.auth = TimedAuthentication(db_path, hash_workers=workers, bcrypt_rounds=cost)
+        self.latencies = {"login": [], "register": []}
+        self.failures = {"login": 0, "register": 0}
+        self.results_lock = threading.Lock()
+    
+    def run(self):
+        print(f"🏁 認証ベンチマーク: users={self.users} operations={self.operations} "
+              f"workers={self.workers} cost={self.cost} mode={self.mode}")
+        self.auth.connect()
+        try:
+            self._seed()
+            operations = self._plan_operations()
+            self.auth.reset_timings()
+            
+            start = time.perf_counter()
+            if self.mode == "async":
+                asyncio.run(self._run_async(operations))
+            else:
+                self._run_threads(operations)
+            wall_seconds = time.perf_counter() - start
+        finally:
+            self.auth.close()
+        
+        return self._summarize(wall_seconds)
+    
+    def _seed(self):
+        start = time.perf_counter()
+        result = self.auth.register_users_bulk(
+            (self._username(i), self._password(i), f"{self._username(i)}@example.com") for i in range(self.users)
+        )
+        print(f"  🌱 {result['inserted']}ユーザーを登録 ({time.perf_counter() - start:.1f}s)")
+    
+    def _username(self, i):
+        return f"{self.prefix}-{i}"
+    
+    def _password(self, i):
+        return f"password-{i}"
+    
+    def _plan_operations(self):
+        # 操作の並びを事前に決めておき、thread/async のどちらでも同じ負荷をかける
+        operations = []
+        for i in range(self.operations):
+            if self.users and self.random.random() < self.login_ratio:
+                user = self.random.randrange(self.users)
+                operations.append(("login", self._username(user), self._password(user), None))
+            else:
+                username = self._username(f"new-{i}")
+                operations.append(("register", username, self._password(i), f"{username}@example.com"))
+        return operations
+    
+    def _record(self, kind, elapsed, succeeded):
+        with self.results_lock:
+            self.latencies[kind].append(elapsed)
+            if not succeeded:
+                self.failures[kind] += 1
+    
+    def _run_operation(self, operation):
+        kind, username, password, email = operation
+        start = time.perf_counter()
+        if kind == "login":
+            succeeded = self.auth.login(username, password)
+        else:
+            succeeded = self.auth.register_user(username, password, email)
+        self._record(kind, time.perf_counter() - start, succeeded)
+    
+    def _run_threads(self, operations):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._run_operation, operations))
+    
+    async def _run_async(self, operations):
+        pending = iter(operations)
+        
+        async def worker():
+            for kind, username, password, email in pending:
+                start = time.perf_counter()
+                if kind == "login":
+                    succeeded = await self.auth.async_login(username, password)
+                else:
+                    succeeded = await self.auth.async_register_user(username, password, email)
+                self._record(kind, time.perf_counter() - start, succeeded)
+        
+        await asyncio.gather(*[worker() for _ in range(self.workers)])
+    
+    def _summarize(self, wall_seconds):
+        summary = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                "users": self.users,
+                "operations": self.operations,
+                "workers": self.workers,
+                "login_ratio": self.login_ratio,
+                "cost": self.cost,
+                "mode": self.mode
+            },
+            "wall_seconds": round(wall_seconds, 3),
+            "operations": {}
+        }
+        
+        all_latencies = []
+        for kind in ("login", "register", "total"):
+            latencies = sorted(all_latencies if kind == "total" else self.latencies[kind])
+            if kind != "total":
+                all_latencies.extend(latencies)
+            stats = {
+                "count": len(latencies),
+                "failures": sum(self.failures.values()) if kind == "total" else self.failures[kind],
+                "throughput": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0
+            }
+            for p in PERCENTILES:
+                stats[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 2)
+            summary["operations"][kind] = stats
+        
+        # 各操作の所要時間の合計に対する内訳（残りはハッシュ計算待ち・ロック待ちなど）
+        busy = sum(all_latencies)
+        bcrypt_seconds = self.auth.timings["bcrypt"]
+        sqlite_seconds = self.auth.timings["sqlite"]
+        summary["time_split"] = {
+            "bcrypt_seconds": round(bcrypt_seconds, 3),
+            "sqlite_seconds": round(sqlite_seconds, 3),
+            "other_seconds": round(max(0.0, busy - bcrypt_seconds - sqlite_seconds), 3),
+            "bcrypt_ratio": round(bcrypt_seconds / busy, 4) if busy else 0.0,
+            "sqlite_ratio": round(sqlite_seconds / busy, 4) if busy else 0.0
+        }
+        return summary
+
+
+def print_summary(summary):
+    print(f"\n📊 結果 ({summary['wall_seconds']:.2f}s)")
+    print(f"  {'操作':<10}{'件数':>8}{'失敗':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, stats in summary["operations"].items():
+        print(f"  {kind:<10}{stats['count']:>8}{stats['failures']:>6}{stats['throughput']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    
+    split = summary["time_split"]
+    other_ratio = max(0.0, 1 - split["bcrypt_ratio"] - split["sqlite_ratio"])
+    print(f"\n⏱️ 時間内訳: bcrypt {split['bcrypt_ratio']:.1%} / SQLite {split['sqlite_ratio']:.1%} / その他 {other_ratio:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UserAuthentication の登録・ログインに並列で負荷をかけて性能を計測します")
+    parser.add_argument("--users", type=int, default=1000, help="事前に登録するユーザー数（デフォルト: 1000）")
+    parser.add_argument("--operations", type=int, default=500, help="計測する操作の総数（デフォルト: 500）")
+    parser.add_argument("--workers", type=int, default=8, help="同時に操作するワーカー数（デフォルト: 8）")
+    parser.add_argument("--login-ratio", type=float, default=0.8, help="操作のうちログインの割合（デフォルト: 0.8）")
+    parser.add_argument("--cost", type=int, default=DEFAULT_COST, help=f"bcryptのコスト（デフォルト: {DEFAULT_COST}、本番は12）")
+    parser.add_argument("--mode", choices=["thread", "async"], default="thread",
+                        help="thread: 同期APIをスレッドから呼ぶ / async: async_login・async_register_user を使う")
+    parser.add_argument("--db", help="使用するSQLiteファイル（省略時は一時ファイル）")
+    parser.add_argument("--seed", type=int, default=0, help="操作の並びを決める乱数シード")
+    parser.add_argument("--output", help="結果をJSONで保存する")
+    parser.add_argument("--max-p95-ms", type=float, help="全体のp95がこれを超えたら終了コード1（リグレッション検出用）")
+    args = parser.parse_args()
+    
+    if not 4 <= args.cost <= 31:
+        parser.error("--cost must be between 4 and 31")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = args.db or os.path.join(temp_dir, "benchmark.db")
+        benchmark = AuthBenchmark(db_path, args.users, args.operations, args.workers,
+                                  args.login_ratio, args.cost, args.mode, args.seed)
+        summary = benchmark.run()
+    
+    print_summary(summary)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 結果を保存しました: {args.output}")
+    
+    failures = summary["operations"]["total"]["failures"]
+    if failures:
+        print(f"\n❌ {failures}件の操作が失敗しました")
+        sys.exit(1)
+    p95 = summary["operations"]["total"]["p95_ms"]
+    if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+        print(f"\n❌ p95 {p95:.1f} ms が上限 {args.max_p95_ms:.1f} ms を超えています")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,87 @@
+import os
 import bcrypt
 import sqlite3
+import asyncio
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA foreign_keys = ON",
+)
+BUSY_TIMEOUT_SECONDS = 5.0
+# SQLiteのバインド変数の上限（古いビルドは999）を超えないように分割して問い合わせる
+CONFLICT_QUERY_CHUNK = 500
+# bcrypt はハッシュ計算中にGILを解放するため、スレッドプールでCPUコア数まで並列化できる
+HASH_WORKERS = os.cpu_count() or 4
+BCRYPT_ROUNDS = 12
+# ハッシュ計算の待ち行列の上限（ワーカー数の倍数）。超えた呼び出しは空きが出るまで待たせる
+MAX_PENDING_PER_WORKER = 4
 
 
 class UserAuthentication:
-    def __init__(self, db_path="users.db"):
+    def __init__(self, db_path="users.db", hash_workers=HASH_WORKERS, max_pending=None, bcrypt_rounds=BCRYPT_ROUNDS):
         self.db_path = db_path
-        self.conn = None
-        
+        self.bcrypt_rounds = bcrypt_rounds
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.hash_workers = hash_workers
+        self.max_pending = max_pending or hash_workers * MAX_PENDING_PER_WORKER
+        self._hash_executor = None
+        self._hash_slots = weakref.WeakKeyDictionary()
+        self._dummy_hash = None
+    
+    @property
+    def conn(self):
+        # 接続はスレッドごとに1つ作成して使い回す
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+        return conn
+    
+    def _open_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+    
+    @property
+    def hash_executor(self):
+        if self._hash_executor is None:
+            self._hash_executor = ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="bcrypt")
+        return self._hash_executor
+    
+    async def _run_hashing(self, func, *args):
+        # イベントループごとにセマフォを持ち、待ち行列が上限に達したら呼び出し側を待たせる（バックプレッシャー）
+        loop = asyncio.get_running_loop()
+        slots = self._hash_slots.get(loop)
+        if slots is None:
+            slots = self._hash_slots[loop] = asyncio.Semaphore(self.max_pending)
+        async with slots:
+            return await loop.run_in_executor(self.hash_executor, func, *args)
+    
+    def _hash_password(self, password):
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.bcrypt_rounds)).decode()
+    
+    def _check_password(self, password, hashed_password):
+        if hashed_password is None:
+            # 存在しないユーザーでも同じだけ計算し、応答時間からユーザー名を推測されないようにする
+            if self._dummy_hash is None:
+                self._dummy_hash = self._hash_password(os.urandom(16).hex())
+            bcrypt.checkpw(password.encode(), self._dummy_hash.encode())
+            return False
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    
     def connect(self):
-        self.conn = sqlite3.connect(self.db_path)
         self._create_tables()
     
     def _create_tables(self):
@@ -24,10 +97,14 @@ class UserAuthentication:
         self.conn.commit()
     
     def register_user(self, username, password, email):
+        return self._insert_user(username, self._hash_password(password), email)
+    
+    async def async_register_user(self, username, password, email):
+        hashed_password = await self._run_hashing(self._hash_password, password)
+        return await asyncio.to_thread(self._insert_user, username, hashed_password, email)
+    
+    def _insert_user(self, username, hashed_password, email):
         cursor = self.conn.cursor()
-        
-        hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-        
         try:
             cursor.execute(
                 "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
@@ -36,21 +113,91 @@ class UserAuthentication:
             self.conn.commit()
             return True
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             return False
     
-    def login(self, username, password):
-        cursor = self.conn.cursor()
+    def register_users_bulk(self, users):
+        users = [tuple(user) for user in users]
+        conn = self.conn
+        
+        # 既存ユーザー・一括登録内の重複を先に除き、ハッシュ化は登録対象の行だけに行う
+        conflicts = self._find_conflicts(conn, users, range(len(users)))
+        candidates = [index for index in range(len(users)) if index not in conflicts]
+        hashed = dict(zip(candidates, self.hash_executor.map(
+            self._hash_password, [users[index][1] for index in candidates]
+        )))
         
-        hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        # 書き込みロックを取ってから再確認し、全件を1トランザクション（fsync 1回）で登録する
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conflicts.update(self._find_conflicts(conn, users, candidates))
+            rows = [
+                (users[index][0], hashed[index], users[index][2])
+                for index in candidates if index not in conflicts
+            ]
+            conn.executemany("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", rows)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
         
-        cursor.execute(
-            "SELECT id FROM users WHERE username = ? AND password = ?",
-            (username, hashed_password)
-        )
+        return {
+            "inserted": len(rows),
+            "conflicts": [
+                {"index": index, "username": users[index][0], "email": users[index][2], "reason": reason}
+                for index, reason in sorted(conflicts.items())
+            ]
+        }
+    
+    def _find_conflicts(self, conn, users, indexes):
+        indexes = list(indexes)
+        existing = {"username": set(), "email": set()}
+        for column, position in (("username", 0), ("email", 2)):
+            values = list({users[index][position] for index in indexes})
+            for start in range(0, len(values), CONFLICT_QUERY_CHUNK):
+                chunk = values[start:start + CONFLICT_QUERY_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = conn.execute(f"SELECT {column} FROM users WHERE {column} IN ({placeholders})", chunk)
+                existing[column].update(row[0] for row in cursor)
         
+        conflicts = {}
+        seen = {"username": set(), "email": set()}
+        for index in indexes:
+            username, _, email = users[index]
+            if username in existing["username"]:
+                conflicts[index] = "username exists"
+            elif email in existing["email"]:
+                conflicts[index] = "email exists"
+            elif username in seen["username"]:
+                conflicts[index] = "duplicate username"
+            elif email in seen["email"]:
+                conflicts[index] = "duplicate email"
+            else:
+                seen["username"].add(username)
+                seen["email"].add(email)
+        return conflicts
+    
+    def login(self, username, password):
+        return self._check_password(password, self._get_password_hash(username))
+    
+    async def async_login(self, username, password):
+        hashed_password = await asyncio.to_thread(self._get_password_hash, username)
+        return await self._run_hashing(self._check_password, password, hashed_password)
+    
+    def _get_password_hash(self, username):
+        # 保存済みのハッシュ（ソルトを含む）を取得して照合する
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
         result = cursor.fetchone()
-        return result is not None
+        return result[0] if result else None
     
     def close(self):
-        if self.conn:
-            self.conn.close()
+        if self._hash_executor is not None:
+            self._hash_executor.shutdown()
+            self._hash_executor = None
+        self._hash_slots.clear()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -3,18 +3,41 @@
 import os
 import sys
 import re
+import shutil
+import difflib
+import argparse
+import tempfile
 from pathlib import Path
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+from report_formats import load_findings_jsonl
 
 if sys.platform == 'win32':
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
+# これ未満のファイル数ではプロセスプールの起動コストが上回るため逐次実行する
+PARALLEL_MIN_FILES = 8
+
 
 class AutoFixer:
-    def __init__(self, report_path):
+    # 問題メッセージ → 修正メソッド（上から順に判定する）
+    FIXERS = (
+        ("SHA256/MD5はパスワードハッシュに適していません", "_fix_weak_password_hash"),
+        ("パスワードが平文で保存", "_fix_plain_password"),
+        ("eval()の使用", "_fix_eval_usage"),
+        ("SQL Injection", "_fix_sql_injection"),
+        ("APIキーがハードコード", "_fix_hardcoded_api_key"),
+    )
+    
+    def __init__(self, report_path, dry_run=False, jobs=1):
         self.report_path = report_path
+        self.dry_run = dry_run
+        self.jobs = max(1, jobs or 1)
         self.fixes_applied = []
+        self.patches = []
         
     def run(self):
         print(f"🔧 自動修正を開始: {self.report_path}")
@@ -23,10 +46,7 @@ class AutoFixer:
             print(f"❌ レポートが見つかりません: {self.report_path}")
             return False
         
-        with open(self.report_path, 'r', encoding='utf-8') as f:
-            report_content = f.read()
-        
-        critical_issues = self._extract_critical_issues(report_content)
+        critical_issues = self._load_critical_issues()
         
         if not critical_issues:
             print("✅ Critical問題なし。修正不要です。")
@@ -34,11 +54,15 @@ class AutoFixer:
         
         print(f"🔍 {len(critical_issues)}件のCritical問題を検出")
         
-        for issue in critical_issues:
-            self._fix_issue(issue)
+        grouped = self._group_by_file(critical_issues)
+        for (file_path, issues), result in zip(grouped.items(), self._compute_fixes(grouped)):
+            self._apply_fix(file_path, issues, result)
         
         if self.fixes_applied:
-            print(f"\n✅ {len(self.fixes_applied)}件の修正を適用しました:")
+            if self.dry_run:
+                print(f"\n🔎 {len(self.fixes_applied)}件の修正案を作成しました（ファイルは変更していません）:")
+            else:
+                print(f"\n✅ {len(self.fixes_applied)}件の修正を適用しました:")
             for fix in self.fixes_applied:
                 print(f"  - {fix}")
             return True
@@ -46,6 +70,29 @@ class AutoFixer:
             print("\n⚠️ 自動修正可能な問題がありませんでした")
             return False
     
+    def _load_critical_issues(self):
+        # code_reviewer.py が出力した JSONL があればそれを読み、なければ Markdown を解析する
+        findings_path = Path(self.report_path)
+        if findings_path.suffix != ".jsonl":
+            findings_path = findings_path.with_suffix(".jsonl")
+        
+        if findings_path.exists():
+            return [
+                {
+                    "category": finding["category"].upper(),
+                    "file": finding["file"],
+                    "line": finding.get("line"),
+                    "message": finding["message"],
+                    "recommendation": finding["recommendation"]
+                }
+                for finding in load_findings_jsonl(findings_path, severity="critical")
+            ]
+        
+        with open(self.report_path, 'r', encoding='utf-8') as f:
+            report_content = f.read()
+        
+        return self._extract_critical_issues(report_content)
+    
     def _extract_critical_issues(self, report_content):
         issues = []
         
@@ -66,51 +113,121 @@ class AutoFixer:
             re.DOTALL
         )
         
-        for category, file_path, message, recommendation in issue_blocks:
+        for category, location, message, recommendation in issue_blocks:
+            file_path, line = self._split_location(location.strip())
             issues.append({
                 "category": category,
-                "file": file_path.strip(),
+                "file": file_path,
+                "line": line,
                 "message": message.strip(),
                 "recommendation": recommendation.strip()
             })
         
         return issues
     
-    def _fix_issue(self, issue):
-        file_path = issue["file"]
+    @staticmethod
+    def _split_location(location):
+        match = re.match(r'^(.+):(\d+)$', location)
+        if match:
+            return match.group(1), int(match.group(2))
+        return location, None
+    
+    @staticmethod
+    def _group_by_file(issues):
+        grouped = {}
+        for issue in issues:
+            grouped.setdefault(issue["file"], []).append(issue)
+        return grouped
+    
+    def _select_fixer(self, issue):
+        for message, fixer in self.FIXERS:
+            if message in issue["message"]:
+                return fixer
+        return None
+    
+    def _compute_fixes(self, grouped):
+        # 結果は常に grouped の順序で返すため、並列実行でも出力は逐次実行と同一になる
+        files = list(grouped)
+        if self.jobs > 1 and len(files) >= PARALLEL_MIN_FILES:
+            workers = min(self.jobs, len(files))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                yield from executor.map(self._compute_fix, files, grouped.values(),
+                                        chunksize=max(1, len(files) // (workers * 4)))
+            return
         
+        for file_path, issues in grouped.items():
+            yield self._compute_fix(file_path, issues)
+    
+    def _compute_fix(self, file_path, issues):
         if not os.path.exists(file_path):
-            print(f"  ⚠️ ファイルが見つかりません: {file_path}")
-            return
+            return None
         
-        with open(file_path, 'r', encoding='utf-8') as f:
+        # 改行コードを保持したまま読み込む（差分を git apply できるようにするため）
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
             content = f.read()
         
         original_content = content
         
-        if "SHA256/MD5はパスワードハッシュに適していません" in issue["message"]:
-            content = self._fix_weak_password_hash(content, file_path)
-        
-        elif "パスワードが平文で保存" in issue["message"]:
-            content = self._fix_plain_password(content, file_path)
+        # 修正処理はファイル全体に作用するため、同じ修正は1ファイルにつき1回だけ適用する
+        fixed_by = {}
+        for issue in issues:
+            fixer = self._select_fixer(issue)
+            if fixer is None or fixer in fixed_by:
+                continue
+            fixed_content = getattr(self, fixer)(content, file_path)
+            fixed_by[fixer] = fixed_content != content
+            content = fixed_content
         
-        elif "eval()の使用" in issue["message"]:
-            content = self._fix_eval_usage(content, file_path)
+        return original_content, content, fixed_by
+    
+    def _apply_fix(self, file_path, issues, result):
+        if result is None:
+            print(f"  ⚠️ ファイルが見つかりません: {file_path}")
+            return
         
-        elif "SQL Injection" in issue["message"]:
-            content = self._fix_sql_injection(content, file_path)
+        original_content, content, fixed_by = result
+        if content != original_content:
+            if self.dry_run:
+                self.patches.append(self._unified_diff(file_path, original_content, content))
+            else:
+                self._write_atomic(file_path, content)
         
-        elif "APIキーがハードコード" in issue["message"]:
-            content = self._fix_hardcoded_api_key(content, file_path)
+        for issue in issues:
+            if fixed_by.get(self._select_fixer(issue)):
+                self.fixes_applied.append(f"{issue['category']}: {file_path}")
+                print(f"  ✅ 修正{'案' if self.dry_run else '適用'}: {file_path} - {issue['message']}")
+            else:
+                print(f"  ⚠️ 自動修正不可: {file_path} - {issue['message']}")
+    
+    @staticmethod
+    def _unified_diff(file_path, original_content, content):
+        path = Path(file_path).as_posix()
+        diff_lines = difflib.unified_diff(
+            original_content.splitlines(keepends=True),
+            content.splitlines(keepends=True),
+            f"a/{path}",
+            f"b/{path}"
+        )
         
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
+        patch = f"diff --git a/{path} b/{path}\n"
+        for line in diff_lines:
+            patch += line if line.endswith("\n") else line + "\n\\ No newline at end of file\n"
+        return patch
+    
+    @staticmethod
+    def _write_atomic(file_path, content):
+        # 一時ファイルに書き込んでから置き換え、書き込み途中で失敗しても元のファイルを壊さない
+        target_path = os.path.realpath(file_path)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), prefix=".autofix-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
                 f.write(content)
-            
-            self.fixes_applied.append(f"{issue['category']}: {file_path}")
-            print(f"  ✅ 修正適用: {file_path} - {issue['message']}")
-        else:
-            print(f"  ⚠️ 自動修正不可: {file_path} - {issue['message']}")
+            shutil.copymode(target_path, temp_path)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
     
     def _fix_weak_password_hash(self, content, file_path):
         if file_path.endswith('.py'):
@@ -196,16 +313,32 @@ class AutoFixer:
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python auto_fixer.py <review-report-path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="レビューレポートのCritical問題を自動修正します")
+    parser.add_argument("report_path", help="レビューレポート（.md または .jsonl）")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="ファイルを変更せず、修正内容を unified diff として出力する")
+    parser.add_argument("-o", "--output", help="--dry-run の差分を標準出力ではなくパッチファイルに書き込む")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="修正内容を計算する並列ワーカー数（デフォルト: CPU数）")
+    args = parser.parse_args()
+    
+    fixer = AutoFixer(args.report_path, dry_run=args.dry_run, jobs=args.jobs)
     
-    report_path = sys.argv[1]
+    if args.dry_run and not args.output:
+        # 標準出力は差分のみにして、そのまま git apply に渡せるようにする
+        with redirect_stdout(sys.stderr):
+            success = fixer.run()
+        sys.stdout.write("".join(fixer.patches))
+        sys.exit(0 if success else 1)
     
-    fixer = AutoFixer(report_path)
     success = fixer.run()
     
-    if success and fixer.fixes_applied:
+    if args.dry_run and fixer.patches:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write("".join(fixer.patches))
+        print(f"\n📝 パッチを出力しました: {args.output}")
+        print(f"  git apply {args.output}")
+    elif success and fixer.fixes_applied:
         print("\n📝 修正を反映するため、変更をステージングしてください:")
         print("  git add -u")
         print("  git commit --amend --no-edit")
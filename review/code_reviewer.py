@@ -7,6 +7,26 @@ from datetime import datetime
 from pathlib import Path
 import subprocess
 import re
+import argparse
+import hashlib
+import time
+import sqlite3
+import itertools
+import codecs
+from functools import partial
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from review_cache import ReviewCache, content_key, blob_key
+from git_objects import CatFileBatch
+from source_reader import DEFAULT_MAX_FILE_SIZE, read_source, decode_source
+from python_analyzer import analyze_python
+from report_formats import SEVERITIES, iter_findings, write_finding_record, write_findings_jsonl, write_sarif
+from findings import SPILL_THRESHOLD, Finding, FindingStore, register_rules
+from review_profiler import ReviewProfiler, profile_phase
+from file_watcher import FileWatcher
+from review_history import ReviewHistory, current_revision
+from review_baseline import DEFAULT_BASELINE_PATH, ReviewBaseline, snippet_hash, finding_fingerprint
 
 if sys.platform == 'win32':
     import codecs
@@ -14,37 +34,765 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
+# check 関数の判定ロジックを変更したら上げる（キャッシュ済みの結果を無効化するため）
+RULE_SET_VERSION = 4
+
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+_EXCEPT_CLAUSE = re.compile(r'\bexcept\s+')
+_TRY_BLOCK = re.compile(r'\btry\s*:')
+
+# literals: 小文字化した本文に対する事前フィルタ（いずれか1つを含む場合のみ pattern/check を評価）
+# scope: "file" のルールはファイル全体を前提に判定するため、差分モードでも全文に対して評価する
+# ast: .py ファイルでは python_analyzer の構文木解析で判定する（構文エラー時のみ pattern/check を使用）
+REVIEW_RULES = [
+    {
+        "id": "short-function-name",
+        "severity": "minor",
+        "category": "code_quality",
+        "ast": True,
+        "extensions": ('.py',),
+        "literals": ("def",),
+        "pattern": r'\bdef\s+[a-z]{1,2}\b',
+        "message": "関数名が短すぎます（2文字以下）",
+        "recommendation": "意味のある関数名を使用してください"
+    },
+    {
+        "id": "file-too-long",
+        "scope": "file",
+        "severity": "medium",
+        "category": "code_quality",
+        "extensions": ('.py',),
+        "check": lambda content, has: content.count('\n') >= 500,
+        "message": "ファイルが500行を超えています",
+        "recommendation": "モジュールを分割してください"
+    },
+    {
+        "id": "weak-password-hash",
+        "severity": "critical",
+        "category": "security",
+        "literals": ("hashlib.sha256", "hashlib.md5"),
+        "check": lambda content, has: "hashlib.sha256" in content or "hashlib.md5" in content,
+        "message": "SHA256/MD5はパスワードハッシュに適していません",
+        "recommendation": "bcryptやArgon2等の遅いハッシュ関数を使用してください"
+    },
+    {
+        "id": "plain-password",
+        "scope": "file",
+        "severity": "critical",
+        "category": "security",
+        "literals": ("password",),
+        "check": lambda content, has: not has("hash"),
+        "message": "パスワードが平文で保存されている可能性",
+        "recommendation": "bcryptやArgon2でハッシュ化してください"
+    },
+    {
+        "id": "eval-usage",
+        "severity": "critical",
+        "category": "security",
+        "ast": True,
+        "literals": ("eval",),
+        "pattern": r'eval\s*\(',
+        "message": "eval()の使用を検出（Code Injection リスク）",
+        "recommendation": "eval()を使用せず、安全な方法で実装してください"
+    },
+    {
+        "id": "sql-injection",
+        "severity": "critical",
+        "category": "security",
+        "literals": ("select",),
+        "pattern": r'["\']SELECT\s+.*\s+FROM\s+.*["\'].*\+',
+        "flags": re.IGNORECASE,
+        "message": "SQL Injection の可能性（文字列連結でSQL構築）",
+        "recommendation": "プリペアドステートメント・パラメータ化クエリを使用してください"
+    },
+    {
+        "id": "hardcoded-api-key",
+        "severity": "critical",
+        "category": "security",
+        "literals": ("api",),
+        "pattern": r'api[_-]?key\s*=\s*["\'][^"\']+["\']',
+        "flags": re.IGNORECASE,
+        "message": "APIキーがハードコードされています",
+        "recommendation": "環境変数や設定ファイルで管理してください"
+    },
+    {
+        "id": "nested-loop",
+        "severity": "medium",
+        "category": "performance",
+        "ast": True,
+        "extensions": ('.py',),
+        "literals": ("for",),
+        "pattern": r'for\s+.*:\s*\n\s+for\s+.*:',
+        "message": "ネストしたループを検出（O(N²)の可能性）",
+        "recommendation": "アルゴリズムの最適化を検討してください"
+    },
+    {
+        "id": "n-plus-one-query",
+        "severity": "medium",
+        "category": "performance",
+        "ast": True,
+        "literals": (".query(",),
+        "pattern": r'for\s+.*\s+in\s+.*\.query\(',
+        "message": "N+1クエリ問題の可能性",
+        "recommendation": "join()やselect_related()を使用してください"
+    },
+    {
+        "id": "bare-except",
+        "scope": "file",
+        "severity": "medium",
+        "category": "error_handling",
+        "ast": True,
+        "extensions": ('.py',),
+        "literals": ("except:",),
+        "check": lambda content, has: 'except:' in content and _EXCEPT_CLAUSE.search(content) is not None,
+        "message": "汎用的なexceptを使用しています",
+        "recommendation": "具体的な例外クラスを指定してください"
+    },
+    {
+        "id": "open-without-try",
+        "scope": "file",
+        "severity": "minor",
+        "category": "error_handling",
+        "ast": True,
+        "extensions": ('.py',),
+        "literals": ("open(",),
+        "check": lambda content, has: 'open(' in content and _TRY_BLOCK.search(content) is None,
+        "message": "ファイル操作にtry-exceptがありません",
+        "recommendation": "with文またはtry-exceptでエラーハンドリングしてください"
+    },
+    {
+        "id": "wildcard-import",
+        "severity": "minor",
+        "category": "best_practices",
+        "ast": True,
+        "extensions": ('.py',),
+        "literals": ("import *",),
+        "check": lambda content, has: 'import *' in content,
+        "message": "import *を使用しています",
+        "recommendation": "必要なモジュールのみを明示的にimportしてください"
+    },
+    {
+        "id": "class-naming",
+        "severity": "minor",
+        "category": "best_practices",
+        "ast": True,
+        "extensions": ('.py',),
+        "literals": ("class",),
+        "pattern": r'class\s+[a-z]',
+        "message": "クラス名がPascalCaseになっていません",
+        "recommendation": "PEP 8に従い、クラス名はPascalCaseで記述してください"
+    },
+]
+
+
+class RuleEngine:
+    # all_occurrences: ルールごとに最初の1件ではなくすべての出現箇所を検出する（ベースライン使用時）
+    def __init__(self, rules, all_occurrences=False):
+        self.all_occurrences = all_occurrences
+        self.rules = [self._compile(rule) for rule in rules]
+        self.rules_by_id = {rule["id"]: rule for rule in self.rules}
+        self.rule_order = {rule["id"]: index for index, rule in enumerate(self.rules)}
+        self.ast_rules = [rule for rule in self.rules if rule["ast"]]
+        self.version = self._fingerprint(rules) + ("-all" if all_occurrences else "")
+        register_rules(self.rules)
+    
+    def _fingerprint(self, rules):
+        fields = ("id", "severity", "category", "scope", "ast", "extensions", "literals", "pattern", "flags", "message", "recommendation")
+        payload = json.dumps([[rule.get(field) for field in fields] for rule in rules], ensure_ascii=False, default=str)
+        return f"{RULE_SET_VERSION}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]}"
+    
+    def _compile(self, rule):
+        compiled = dict(rule)
+        compiled["scope"] = rule.get("scope", "line")
+        compiled["ast"] = rule.get("ast", False)
+        compiled["extensions"] = tuple(rule.get("extensions", ()))
+        compiled["literals"] = tuple(literal.lower() for literal in rule.get("literals", ()))
+        compiled["regex"] = re.compile(rule["pattern"], rule.get("flags", 0)) if rule.get("pattern") else None
+        compiled["check"] = rule.get("check")
+        return compiled
+    
+    def evaluate(self, file_path, content, regions=None, profiler=None):
+        if regions is not None and not regions:
+            # 差分モードで変更行のないファイル
+            return []
+        rules = self.rules
+        ast_findings = []
+        if self.ast_rules and file_path.endswith('.py'):
+            with profile_phase(profiler, "python_ast"):
+                occurrences = analyze_python(content)
+            if occurrences is not None:
+                rules = [rule for rule in self.rules if not rule["ast"]]
+                ast_findings = self._ast_findings(file_path, occurrences, regions)
+                if profiler is not None:
+                    # ast ルールの時間は python_ast フェーズにまとめて計上する
+                    for rule in self.ast_rules:
+                        profiler.record_rule(rule, 0.0, sum(f.rule == rule["id"] for f in ast_findings))
+        
+        if regions is None:
+            findings = self._evaluate_text(file_path, content, rules, profiler=profiler)
+        else:
+            findings = self._evaluate_regions(file_path, content, rules, regions, profiler)
+        
+        if ast_findings:
+            findings.extend(ast_findings)
+            findings.sort(key=lambda finding: (self.rule_order[finding.rule], finding.line or 0))
+        if findings:
+            self._attach_snippets(findings, content)
+        return findings
+    
+    @staticmethod
+    def _attach_snippets(findings, content):
+        # ベースライン照合用に該当行の内容を記録する（行番号がずれても同じ問題と判定できるように）
+        # 大きなファイルでも行の一覧は作らず、行番号の小さい順に改行を辿って該当行だけを切り出す
+        snippets = {}
+        start = 0
+        current = 1
+        for line in sorted({finding.line for finding in findings if finding.line is not None and finding.line > 0}):
+            while current < line:
+                start = content.find('\n', start) + 1
+                if start == 0:
+                    break
+                current += 1
+            if current < line:
+                break
+            end = content.find('\n', start)
+            snippets[line] = content[start:] if end < 0 else content[start:end]
+        for finding in findings:
+            finding.snippet_hash = snippet_hash(snippets.get(finding.line, ""))
+    
+    def _ast_findings(self, file_path, occurrences, regions):
+        findings = []
+        for rule in self.ast_rules:
+            candidates = occurrences.get(rule["id"], [])
+            if self.all_occurrences:
+                selected = [
+                    candidate for candidate in candidates
+                    if regions is None or any(start <= candidate[0] <= end for start, end in regions)
+                ]
+            elif regions is None:
+                selected = candidates[:1]
+            else:
+                selected = [
+                    next((candidate for candidate in candidates if start <= candidate[0] <= end), None)
+                    for start, end in regions
+                ]
+            for candidate in selected:
+                if candidate is not None:
+                    line, detail = candidate
+                    findings.append(self._make_finding(rule, file_path, line, detail))
+        return findings
+    
+    def _evaluate_regions(self, file_path, content, rules, regions, profiler=None):
+        # regions: 変更行の範囲 [(開始行, 終了行), ...]（1始まり・両端を含む）
+        lines = content.split('\n')
+        windows = [('\n'.join(lines[start - 1:end]), start - 1) for start, end in regions]
+        changed = '\n'.join(window for window, _ in windows).lower()
+        
+        findings = []
+        line_rules = [rule for rule in rules if rule["scope"] == "line"]
+        for window, line_offset in windows:
+            findings.extend(self._evaluate_text(file_path, window, line_rules, line_offset, profiler))
+        
+        file_rules = [
+            rule for rule in rules
+            if rule["scope"] == "file"
+            and (not rule["literals"] or any(literal in changed for literal in rule["literals"]))
+        ]
+        findings.extend(self._evaluate_text(file_path, content, file_rules, profiler=profiler))
+        
+        findings.sort(key=lambda finding: (self.rule_order[finding.rule], finding.line or 0))
+        return findings
+    
+    def _evaluate_text(self, file_path, text, rules, line_offset=0, profiler=None):
+        lowered = text.lower()
+        literal_positions = {}
+        
+        def find(literal):
+            if literal not in literal_positions:
+                literal_positions[literal] = lowered.find(literal)
+            return literal_positions[literal]
+        
+        def has(literal):
+            return find(literal) >= 0
+        
+        findings = []
+        for rule in rules:
+            if rule["extensions"] and not file_path.endswith(rule["extensions"]):
+                continue
+            
+            if profiler is None:
+                matched = self._match_rule(rule, file_path, text, lowered, find, has, line_offset)
+            else:
+                start = time.perf_counter()
+                matched = self._match_rule(rule, file_path, text, lowered, find, has, line_offset)
+                profiler.record_rule(rule, time.perf_counter() - start, len(matched))
+            
+            findings.extend(matched)
+        return findings
+    
+    def _match_rule(self, rule, file_path, text, lowered, find, has, line_offset):
+        every = self.all_occurrences and rule["scope"] == "line"
+        lines = [None]
+        if rule["literals"]:
+            positions = [find(literal) for literal in rule["literals"] if has(literal)]
+            if not positions:
+                return []
+            if every and rule["regex"] is None:
+                positions = [
+                    match.start() for literal in rule["literals"]
+                    for match in re.finditer(re.escape(literal), lowered)
+                ]
+                lines = _line_numbers(lowered, positions)
+            else:
+                lines = [lowered.count('\n', 0, min(positions)) + 1]
+        
+        if rule["regex"] is not None:
+            if every:
+                positions = [match.start() for match in rule["regex"].finditer(text)]
+            else:
+                match = rule["regex"].search(text)
+                positions = [match.start()] if match else []
+            if not positions:
+                return []
+            lines = _line_numbers(text, positions)
+        
+        if rule["check"] is not None and not rule["check"](text, has):
+            return []
+        
+        return [self._make_finding(rule, file_path, None if line is None else line + line_offset) for line in lines]
+    
+    def findings_for(self, file_path, entries):
+        return [
+            self._make_finding(self.rules_by_id[rule_id], file_path, line, detail, snippet)
+            for rule_id, line, detail, snippet in entries
+        ]
+    
+    def _make_finding(self, rule, file_path, line=None, detail=None, snippet=None):
+        # 文言は MESSAGE_CATALOG に1つだけ持ち、検出結果にはルールIDと位置だけを記録する
+        return Finding(rule["id"], file_path, line, detail, snippet)
+
+
+def _line_numbers(text, positions):
+    # 文字位置を1始まりの行番号に変換する（同じ行の複数の一致は1件にまとめる）
+    lines = []
+    line = 1
+    previous = 0
+    for position in sorted(positions):
+        line += text.count('\n', previous, position)
+        previous = position
+        if not lines or lines[-1] != line:
+            lines.append(line)
+    return lines
+
+
+RULE_ENGINE = RuleEngine(REVIEW_RULES)
+# ベースラインの作成・照合では、既知の問題と同じファイルに追加された問題も見逃さないよう全出現箇所を検出する
+BASELINE_RULE_ENGINE = RuleEngine(REVIEW_RULES, all_occurrences=True)
+
+# これ未満のファイル数ではプロセスプールの起動コストが上回るため逐次実行する
+PARALLEL_MIN_FILES = 8
+REVIEW_EXTENSIONS = ('.py', '.js', '.html', '.css')
+REPORT_SECTIONS = (
+    ("critical", "🔴 Critical Issues"),
+    ("medium", "🟡 Medium Issues"),
+    ("minor", "🟢 Minor Issues"),
+)
+# --full-repo: ワーカーに渡すファイル数
+AUDIT_BATCH_SIZE = 32
+# キャッシュへまとめて書き込むファイル数
+CACHE_FLUSH_SIZE = 500
+AUDIT_PROGRESS_INTERVAL = 1000
+
+
 class CodeReviewAgent:
-    def __init__(self, branch_name, target_files=None):
+    def __init__(self, branch_name, target_files=None, rule_engine=None, jobs=1, cache=None,
+                 diff_only=False, context_lines=3, staged=False, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                 profiler=None, history=None, baseline=None, spill_threshold=SPILL_THRESHOLD):
         self.branch_name = branch_name
         self.target_files = target_files or []
-        self.findings = {
-            "critical": [],
-            "medium": [],
-            "minor": []
-        }
+        self.rule_engine = rule_engine or RULE_ENGINE
+        self.jobs = max(1, jobs or 1)
+        self.cache = cache
+        self.diff_only = diff_only
+        self.context_lines = context_lines
+        self.staged = staged
+        self.max_file_size = max_file_size
+        self.profiler = profiler
+        self.history = history
+        self.baseline = baseline
+        self.suppressed_count = 0
+        self.fingerprint_counts = {}
+        self.started = None
+        self.reviewed_files = []
+        # レビューがコミット（staged なら index の tree）全体を対象にしたか。False ならレビュー履歴にリビジョンを記録しない
+        self.whole_commit = False
+        self.spill_threshold = spill_threshold
+        # ファイルごとの検出結果（--watch で変更ファイルだけ差し替えるため、watch() のときだけ保持する）
+        self.retain_file_findings = False
+        self.file_findings = {}
+        self.findings = FindingStore(spill_threshold)
         
     def run_review(self):
         print(f"🔍 Starting code review for branch: {self.branch_name}")
+        self.started = time.perf_counter()
         
-        if not self.target_files:
-            self.target_files = self._get_changed_files()
+        with profile_phase(self.profiler, "git"):
+            changed_files = self._get_staged_files() if self.staged else self._get_changed_files()
+            if self.target_files:
+                # 差分のみ・変更ファイルの一部だけのレビューはコミット全体を承認したことにはならない
+                # （git diff --name-only のパスはカレントディレクトリではなくリポジトリのルートからの相対パス）
+                prefix = _git_root_prefix()
+                targets = {os.path.normpath(f) for f in self.target_files}
+                covers_changes = all(os.path.normpath(os.path.join(prefix, f)) in targets for f in changed_files)
+            else:
+                self.target_files = changed_files
+                covers_changes = True
+        self.whole_commit = covers_changes and not self.diff_only
         
-        for file_path in self.target_files:
-            if not os.path.exists(file_path):
-                continue
+        if self.staged:
+            with profile_phase(self.profiler, "git"):
+                staged_blobs = self._get_staged_blobs(self.target_files)
+            review_files = [f for f in self.target_files if os.path.normpath(f) in staged_blobs]
+        else:
+            staged_blobs = None
+            review_files = [f for f in self.target_files if os.path.exists(f)]
+        self.reviewed_files = review_files
+        
+        if self.diff_only:
+            with profile_phase(self.profiler, "git"):
+                changed_regions = self._get_changed_regions(review_files)
+            # 差分に現れないファイルは変更なしとして扱う（None はファイル全体のレビューを意味するため [] にする）
+            regions = [changed_regions.get(os.path.normpath(f), []) for f in review_files]
+        else:
+            regions = [None] * len(review_files)
+        
+        if self.staged:
+            results = self._analyze_staged_files(review_files, regions, staged_blobs)
+        else:
+            results = self._analyze_files(review_files, regions)
+        
+        self._collect_results(review_files, results)
+        self._generate_report()
+    
+    def audit_repository(self):
+        # リポジトリ全体を監査する。検出結果はファイルごとに .jsonl へ追記し、メモリには件数の集計だけを持つ
+        print(f"🔍 Starting full repository audit: {self.branch_name}")
+        self.started = time.perf_counter()
+        # git ls-files はカレントディレクトリ以下しか返さないため、ルートで実行したときだけリポジトリ全体の監査になる
+        self.whole_commit = not _git_root_prefix()
+        
+        report_dir = Path("review-reports")
+        report_dir.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d")
+        report_path = report_dir / f"audit-{self.branch_name}-{timestamp}.md"
+        findings_path = report_path.with_suffix(".jsonl")
+        
+        counts = {severity: 0 for severity in SEVERITIES}
+        rule_counts = {}
+        files_reviewed = 0
+        self.suppressed_count = 0
+        new_entries = []
+        cached_keys = []
+        
+        with open(findings_path, 'w', encoding='utf-8') as out:
+            for file_path, (cache_key, findings, from_cache) in self._audit_results(_iter_repository_files()):
+                files_reviewed += 1
+                if files_reviewed % AUDIT_PROGRESS_INTERVAL == 0:
+                    print(f"  📂 {files_reviewed:,}ファイル処理済み")
+                
+                if cache_key is not None:
+                    if from_cache:
+                        cached_keys.append(cache_key)
+                    else:
+                        new_entries.append((cache_key, _cache_entries(findings)))
+                    if self.cache is not None and len(new_entries) + len(cached_keys) >= CACHE_FLUSH_SIZE:
+                        self.cache.update(new_entries, cached_keys)
+                        new_entries, cached_keys = [], []
+                
+                # 指紋の出現順はファイル内で数えれば足りるため、ファイルごとにリセットして保持しない
+                self.fingerprint_counts = {}
+                for finding in findings:
+                    if not self._accept_finding(finding):
+                        continue
+                    write_finding_record(out, finding)
+                    counts[finding.severity] += 1
+                    rule_counts[finding.rule] = rule_counts.get(finding.rule, 0) + 1
+        
+        if self.cache is not None:
+            self.cache.update(new_entries, cached_keys)
+        
+        total_findings = sum(counts.values())
+        approval_status = "✅ APPROVED" if counts["critical"] == 0 else "❌ NOT APPROVED"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(self._render_audit_report(timestamp, files_reviewed, counts, rule_counts, findings_path,
+                                              approval_status))
+        
+        print(f"\n📊 監査レポート作成完了: {report_path}")
+        print(f"   Files Reviewed: {files_reviewed:,}")
+        print(f"   Total Findings: {total_findings}")
+        print(f"   Findings: {findings_path}")
+        print(f"   Status: {approval_status}")
+        self._record_history(report_path, counts)
+    
+    def _audit_results(self, paths):
+        batches = iter(lambda: list(itertools.islice(paths, AUDIT_BATCH_SIZE)), [])
+        if self.jobs == 1 or self.profiler is not None or not _is_builtin_engine(self.rule_engine):
+            for batch in batches:
+                for file_path in batch:
+                    yield file_path, _analyze_file(file_path, self.rule_engine, self.cache, None, self.max_file_size,
+                                                   self.profiler)
+            return
+        
+        # 未処理のバッチはワーカー数の2倍までに抑え、ファイル一覧の読み出しを処理速度に合わせる
+        # 結果は投入順に受け取り、.jsonl の行順を逐次実行（-j1）と同じにする
+        cache_dir = self.cache.cache_dir if self.cache is not None else None
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            in_flight = deque()
+            for batch in batches:
+                if len(in_flight) >= self.jobs * 2:
+                    yield from in_flight.popleft().result()
+                in_flight.append(executor.submit(_analyze_batch_in_worker, batch, cache_dir, self.max_file_size,
+                                                 self.rule_engine.all_occurrences))
+            while in_flight:
+                yield from in_flight.popleft().result()
+    
+    def _render_audit_report(self, timestamp, files_reviewed, counts, rule_counts, findings_path, approval_status):
+        report_content = f"""# Full Repository Audit: {self.branch_name}
+
+## Review Date
+{timestamp}
+
+## Summary
+Files Reviewed: {files_reviewed}
+Total Findings: {sum(counts.values())}
+- Critical: {counts["critical"]}
+- Medium: {counts["medium"]}
+- Minor: {counts["minor"]}
+{self._format_baseline_summary()}
+## Findings by Rule
+
+"""
+        
+        if rule_counts:
+            report_content += "| Rule | Severity | Category | Count |\n|---|---|---|---:|\n"
+            for rule in self.rule_engine.rules:
+                if rule["id"] in rule_counts:
+                    report_content += f"| {rule['id']} | {rule['severity']} | {rule['category']} | {rule_counts[rule['id']]} |\n"
+            report_content += f"\n各問題の場所は `{findings_path.name}` を参照してください。\n\n"
+        else:
+            report_content += "問題は検出されませんでした。\n\n"
+        
+        report_content += f"""## Approval Status
+{approval_status}
+"""
+        return report_content
+    
+    def watch(self, debounce=0.3, interval=1.0, use_inotify=True):
+        # ファイル指定時はそのファイルのみ、未指定時はレビュー対象の拡張子すべてを監視する
+        watched_files = {os.path.normpath(f) for f in self.target_files}
+        self.retain_file_findings = True
+        self.run_review()
+        
+        watcher = FileWatcher(".", interval, use_inotify)
+        print(f"\n👀 変更を監視しています（{watcher.backend_name}）。Ctrl+C で終了します")
+        try:
+            while True:
+                changed = watcher.wait(debounce)
+                if watched_files:
+                    changed = [f for f in changed if f in watched_files]
+                else:
+                    changed = [f for f in changed if f.endswith(REVIEW_EXTENSIONS)]
+                if changed:
+                    self._rereview(changed)
+        except KeyboardInterrupt:
+            print("\n⏹️ 監視を終了しました")
+        finally:
+            watcher.close()
+    
+    def _rereview(self, changed_files):
+        print(f"\n🔁 {len(changed_files)}件の変更を再レビュー ({datetime.now().strftime('%H:%M:%S')})")
+        self.started = time.perf_counter()
+        review_files = [f for f in changed_files if os.path.exists(f)]
+        for file_path in changed_files:
+            if file_path not in review_files:
+                print(f"  🗑️ Removed: {file_path}")
+                self.file_findings.pop(file_path, None)
+        
+        if self.diff_only:
+            changed_regions = self._get_changed_regions(review_files)
+            regions = [changed_regions.get(os.path.normpath(f), []) for f in review_files]
+        else:
+            regions = [None] * len(review_files)
+        
+        self._collect_results(review_files, self._analyze_files(review_files, regions))
+        self._generate_report()
+    
+    def _collect_results(self, files, results):
+        self.findings.close()
+        self.findings = FindingStore(self.spill_threshold)
+        self.suppressed_count = 0
+        self.fingerprint_counts = {}
+        
+        collected = set()
+        new_entries = []
+        cached_keys = []
+        cache_hits = 0
+        cache_misses = 0
+        for file_path, (cache_key, findings, from_cache) in zip(files, results):
+            if cache_key is not None:
+                if from_cache:
+                    cached_keys.append(cache_key)
+                    cache_hits += 1
+                else:
+                    new_entries.append((cache_key, _cache_entries(findings)))
+                    cache_misses += 1
+                if self.cache is not None and len(new_entries) + len(cached_keys) >= CACHE_FLUSH_SIZE:
+                    self._flush_cache(new_entries, cached_keys)
+                    new_entries, cached_keys = [], []
             
+            file_path = os.path.normpath(file_path)
+            if self.retain_file_findings:
+                self.file_findings[file_path] = findings
+            elif file_path not in collected:
+                # 保持しない場合は受け取った順に集計し、ファイル単位の結果はすぐに手放す
+                collected.add(file_path)
+                self.fingerprint_counts = {}
+                for finding in findings:
+                    self._add_finding(finding)
+        
+        if self.cache is not None:
+            self._flush_cache(new_entries, cached_keys)
+            print(f"  ♻️ キャッシュ: {cache_hits}件ヒット / {cache_misses}件解析")
+        
+        if self.retain_file_findings:
+            for findings in self.file_findings.values():
+                for finding in findings:
+                    self._add_finding(finding)
+        
+        if self.findings.spilled:
+            print(f"  💾 検出結果 {self.findings.spilled:,}件を一時ファイルへ退避しました")
+    
+    def _flush_cache(self, new_entries, cached_keys):
+        with profile_phase(self.profiler, "cache"):
+            self.cache.update(new_entries, cached_keys)
+    
+    def _use_process_pool(self, file_count):
+        # プロファイル時はルール単位の計測を1プロセスに集約するため逐次実行する
+        return (self.profiler is None and self.jobs > 1 and file_count >= PARALLEL_MIN_FILES
+                and _is_builtin_engine(self.rule_engine))
+    
+    def _analyze_files(self, files, regions):
+        # 結果は常に files の順序で返すため、並列実行でもレポートは逐次実行と同一になる
+        if self._use_process_pool(len(files)):
+            workers = min(self.jobs, len(files))
+            chunksize = max(1, len(files) // (workers * 4))
+            cache_dir = self.cache.cache_dir if self.cache is not None else None
+            worker = partial(_analyze_file_in_worker, cache_dir=cache_dir, max_file_size=self.max_file_size,
+                             all_occurrences=self.rule_engine.all_occurrences)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(worker, files, regions, chunksize=chunksize)
+                for file_path, result in zip(files, results):
+                    print(f"  Reviewing: {file_path}")
+                    yield result
+            return
+        
+        for file_path, file_regions in zip(files, regions):
             print(f"  Reviewing: {file_path}")
-            content = self._read_file(file_path)
-            
-            self._check_code_quality(file_path, content)
-            self._check_security(file_path, content)
-            self._check_performance(file_path, content)
-            self._check_error_handling(file_path, content)
-            self._check_best_practices(file_path, content)
+            yield _analyze_file(file_path, self.rule_engine, self.cache, file_regions, self.max_file_size,
+                                self.profiler)
         
-        self._generate_report()
+    def _analyze_staged_files(self, files, regions, staged_blobs):
+        results = [None] * len(files)
+        pending = []
+        
+        for index, (file_path, file_regions) in enumerate(zip(files, regions)):
+            blob_sha = staged_blobs[os.path.normpath(file_path)]
+            cache_key = None
+            if self.cache is not None and file_regions is None:
+                cache_key = blob_key(file_path, blob_sha, self.rule_engine.version)
+                with profile_phase(self.profiler, "cache"):
+                    entries = self.cache.get(cache_key)
+                if entries is not None:
+                    results[index] = (cache_key, self.rule_engine.findings_for(file_path, entries), True)
+                    continue
+            pending.append((index, file_path, file_regions, blob_sha, cache_key))
+        
+        # ステージ済みblobは1本の git cat-file --batch で読み出す（作業ツリーは参照しない）
+        with CatFileBatch() as cat_file:
+            blobs = cat_file.iter_objects([blob_sha for _, _, _, blob_sha, _ in pending], self.max_file_size or None)
+            if self.profiler is not None:
+                # git からの読み出し時間をデコードと分けて計測するため先に読み切る
+                with self.profiler.phase("git"):
+                    blobs = list(blobs)
+            readable = []
+            for (index, file_path, file_regions, _, cache_key), (size, data) in zip(pending, blobs):
+                with profile_phase(self.profiler, "file_io"):
+                    content = _decode_blob(file_path, size, data, self.max_file_size)
+                if content is None:
+                    results[index] = (None, [], False)
+                else:
+                    readable.append((index, file_path, content, file_regions, cache_key))
+        
+        paths = [file_path for _, file_path, _, _, _ in readable]
+        contents = [content for _, _, content, _, _ in readable]
+        readable_regions = [file_regions for _, _, _, file_regions, _ in readable]
+        if self._use_process_pool(len(readable)):
+            workers = min(self.jobs, len(readable))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                worker = partial(_evaluate_in_worker, all_occurrences=self.rule_engine.all_occurrences)
+                evaluated = list(executor.map(worker, paths, contents, readable_regions,
+                                              chunksize=max(1, len(readable) // (workers * 4))))
+        else:
+            evaluated = [
+                self.rule_engine.evaluate(*args, profiler=self.profiler)
+                for args in zip(paths, contents, readable_regions)
+            ]
+        
+        for (index, _, _, _, cache_key), findings in zip(readable, evaluated):
+            results[index] = (cache_key, findings, False)
+        
+        for file_path, result in zip(files, results):
+            print(f"  Reviewing: {file_path} (staged)")
+            yield result
+    
+    def _get_staged_files(self):
+        try:
+            result = subprocess.run(
+                ["git", "diff", "--cached", "--name-only", "--diff-filter=ACM"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            files = result.stdout.strip().split("\n")
+            return [f for f in files if f.endswith(REVIEW_EXTENSIONS)]
+        except subprocess.CalledProcessError:
+            return []
+    
+    def _get_staged_blobs(self, files):
+        if not files:
+            return {}
         
+        try:
+            result = subprocess.run(
+                ["git", "ls-files", "--stage", "-z", "--", *files],
+                capture_output=True,
+                check=True
+            )
+        except subprocess.CalledProcessError:
+            return {}
+        
+        blobs = {}
+        for entry in result.stdout.split(b'\0'):
+            if not entry:
+                continue
+            info, path = entry.split(b'\t', 1)
+            mode, blob_sha, stage = info.split()
+            # サブモジュール（160000）と競合中のエントリ（stage != 0）は対象外
+            if mode == b'160000' or stage != b'0':
+                continue
+            blobs[os.path.normpath(path.decode('utf-8', 'surrogateescape'))] = blob_sha.decode('ascii')
+        return blobs
+    
     def _get_changed_files(self):
         try:
             result = subprocess.run(
@@ -54,176 +802,122 @@ class CodeReviewAgent:
                 check=True
             )
             files = result.stdout.strip().split("\n")
-            return [f for f in files if f.endswith(('.py', '.js', '.html', '.css'))]
+            return [f for f in files if f.endswith(REVIEW_EXTENSIONS)]
         except subprocess.CalledProcessError:
             return []
     
-    def _read_file(self, file_path):
+    def _get_changed_regions(self, files):
+        if not files:
+            return {}
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            # core.quotePath=false: 非ASCIIのパスを "b/\343..." の形でクォートさせない
+            result = subprocess.run(
+                ["git", "-c", "core.quotePath=false", "diff", "-U0", "--no-color", "--no-ext-diff",
+                 *(["--cached"] if self.staged else []), "develop", "--", *files],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            # 差分が取れないまま全ファイルを「変更なし」として承認しないよう、エラーで終了する
+            print(f"❌ develop との差分を取得できません: {(e.stderr or '').strip()}")
+            sys.exit(2)
+        
+        # 差分のパスはリポジトリルート基準のため、サブディレクトリから実行しても files と照合できるよう変換する
+        root = _git_root_prefix()
+        regions = {}
+        current = None
+        for line in result.stdout.splitlines():
+            if line.startswith('+++ '):
+                path = _unquote_diff_path(line[4:].rstrip('\t'))
+                current = os.path.normpath(os.path.join(root, path[2:])) if path.startswith('b/') else None
+                if current is not None:
+                    regions.setdefault(current, [])
+            elif line.startswith('@@') and current is not None:
+                match = _HUNK_HEADER.match(line)
+                if not match:
+                    continue
+                start = int(match.group(1))
+                count = int(match.group(2)) if match.group(2) is not None else 1
+                # 削除のみのhunkは start が直前の行を指すため、その周辺を対象にする
+                end = start + max(count, 1) - 1
+                regions[current].append((max(1, start - self.context_lines), end + self.context_lines))
+        
+        changed = {path: self._merge_regions(ranges) for path, ranges in regions.items()}
+        if not self.staged:
+            # git diff に現れない未追跡のファイルは全体が新規追加のため、ファイル全体をレビューする
+            for path in self._get_untracked_files(files):
+                changed[path] = None
+        return changed
+    
+    @staticmethod
+    def _get_untracked_files(files):
+        try:
+            result = subprocess.run(
+                ["git", "ls-files", "--others", "--exclude-standard", "-z", "--", *files],
+                capture_output=True,
+                check=True
+            )
+        except subprocess.CalledProcessError:
+            return []
+        return [os.path.normpath(path.decode('utf-8', 'surrogateescape')) for path in result.stdout.split(b'\0') if path]
+    
+    @staticmethod
+    def _merge_regions(ranges):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+    
+    @staticmethod
+    def _read_file(file_path, max_file_size=DEFAULT_MAX_FILE_SIZE):
+        try:
+            content, skip_reason = read_source(file_path, max_file_size)
         except Exception as e:
             print(f"  ⚠️ Failed to read {file_path}: {e}")
             return ""
-    
-    def _check_code_quality(self, file_path, content):
-        findings = []
-        
-        if file_path.endswith('.py'):
-            if re.search(r'\bdef\s+[a-z]{1,2}\b', content):
-                findings.append({
-                    "severity": "minor",
-                    "category": "code_quality",
-                    "file": file_path,
-                    "message": "関数名が短すぎます（2文字以下）",
-                    "recommendation": "意味のある関数名を使用してください"
-                })
-            
-            if len(content.split('\n')) > 500:
-                findings.append({
-                    "severity": "medium",
-                    "category": "code_quality",
-                    "file": file_path,
-                    "message": "ファイルが500行を超えています",
-                    "recommendation": "モジュールを分割してください"
-                })
         
-        for finding in findings:
-            self._add_finding(finding)
+        if skip_reason:
+            print(f"  ⏭️ Skipped {file_path}: {skip_reason}")
+        return content
     
-    def _check_security(self, file_path, content):
-        findings = []
-        
-        if "hashlib.sha256" in content or "hashlib.md5" in content:
-            findings.append({
-                "severity": "critical",
-                "category": "security",
-                "file": file_path,
-                "message": "SHA256/MD5はパスワードハッシュに適していません",
-                "recommendation": "bcryptやArgon2等の遅いハッシュ関数を使用してください"
-            })
-        
-        if "password" in content.lower() and "hash" not in content.lower():
-            findings.append({
-                "severity": "critical",
-                "category": "security",
-                "file": file_path,
-                "message": "パスワードが平文で保存されている可能性",
-                "recommendation": "bcryptやArgon2でハッシュ化してください"
-            })
-        
-        if re.search(r'eval\s*\(', content):
-            findings.append({
-                "severity": "critical",
-                "category": "security",
-                "file": file_path,
-                "message": "eval()の使用を検出（Code Injection リスク）",
-                "recommendation": "eval()を使用せず、安全な方法で実装してください"
-            })
-        
-        if re.search(r'["\']SELECT\s+.*\s+FROM\s+.*["\'].*\+', content, re.IGNORECASE):
-            findings.append({
-                "severity": "critical",
-                "category": "security",
-                "file": file_path,
-                "message": "SQL Injection の可能性（文字列連結でSQL構築）",
-                "recommendation": "プリペアドステートメント・パラメータ化クエリを使用してください"
-            })
-        
-        if re.search(r'api[_-]?key\s*=\s*["\'][^"\']+["\']', content, re.IGNORECASE):
-            findings.append({
-                "severity": "critical",
-                "category": "security",
-                "file": file_path,
-                "message": "APIキーがハードコードされています",
-                "recommendation": "環境変数や設定ファイルで管理してください"
-            })
-        
-        for finding in findings:
-            self._add_finding(finding)
+    def _add_finding(self, finding):
+        if not self._accept_finding(finding):
+            return
+        self.findings.add(finding)
     
-    def _check_performance(self, file_path, content):
-        findings = []
-        
-        if file_path.endswith('.py'):
-            nested_loops = re.findall(r'for\s+.*:\s*\n\s+for\s+.*:', content)
-            if len(nested_loops) > 0:
-                findings.append({
-                    "severity": "medium",
-                    "category": "performance",
-                    "file": file_path,
-                    "message": "ネストしたループを検出（O(N²)の可能性）",
-                    "recommendation": "アルゴリズムの最適化を検討してください"
-                })
-        
-        if re.search(r'for\s+.*\s+in\s+.*\.query\(', content):
-            findings.append({
-                "severity": "medium",
-                "category": "performance",
-                "file": file_path,
-                "message": "N+1クエリ問題の可能性",
-                "recommendation": "join()やselect_related()を使用してください"
-            })
+    def _accept_finding(self, finding):
+        # 同じルール・ファイル・行内容の問題が複数ある場合は出現順の番号で区別する
+        key = (finding.rule, finding.file, finding.snippet_hash)
+        occurrence = self.fingerprint_counts.get(key, 0)
+        self.fingerprint_counts[key] = occurrence + 1
+        finding.fingerprint = finding_fingerprint(finding, occurrence)
         
-        for finding in findings:
-            self._add_finding(finding)
+        if self.baseline is not None and finding.fingerprint in self.baseline.fingerprints:
+            self.suppressed_count += 1
+            return False
+        return True
     
-    def _check_error_handling(self, file_path, content):
-        findings = []
-        
-        if file_path.endswith('.py'):
-            try_count = len(re.findall(r'\btry\s*:', content))
-            except_count = len(re.findall(r'\bexcept\s+', content))
-            
-            if except_count > 0 and 'except:' in content:
-                findings.append({
-                    "severity": "medium",
-                    "category": "error_handling",
-                    "file": file_path,
-                    "message": "汎用的なexceptを使用しています",
-                    "recommendation": "具体的な例外クラスを指定してください"
-                })
-            
-            if 'open(' in content and try_count == 0:
-                findings.append({
-                    "severity": "minor",
-                    "category": "error_handling",
-                    "file": file_path,
-                    "message": "ファイル操作にtry-exceptがありません",
-                    "recommendation": "with文またはtry-exceptでエラーハンドリングしてください"
-                })
-        
-        for finding in findings:
-            self._add_finding(finding)
+    @staticmethod
+    def _format_location(finding):
+        if finding.line is None:
+            return finding.file
+        return f"{finding.file}:{finding.line}"
     
-    def _check_best_practices(self, file_path, content):
-        findings = []
-        
-        if file_path.endswith('.py'):
-            if 'import *' in content:
-                findings.append({
-                    "severity": "minor",
-                    "category": "best_practices",
-                    "file": file_path,
-                    "message": "import *を使用しています",
-                    "recommendation": "必要なモジュールのみを明示的にimportしてください"
-                })
-            
-            if re.search(r'class\s+[a-z]', content):
-                findings.append({
-                    "severity": "minor",
-                    "category": "best_practices",
-                    "file": file_path,
-                    "message": "クラス名がPascalCaseになっていません",
-                    "recommendation": "PEP 8に従い、クラス名はPascalCaseで記述してください"
-                })
-        
-        for finding in findings:
-            self._add_finding(finding)
+    @staticmethod
+    def _format_detail(finding):
+        if finding.detail is None:
+            return ""
+        return f"- 詳細: {finding.detail}\n"
     
-    def _add_finding(self, finding):
-        severity = finding["severity"]
-        self.findings[severity].append(finding)
+    def _format_baseline_summary(self):
+        if self.baseline is None:
+            return ""
+        return f"- Baseline: {self.suppressed_count}件の既知の問題を除外（{self.baseline.path}）\n"
     
     def _generate_report(self):
         report_dir = Path("review-reports")
@@ -235,7 +929,51 @@ class CodeReviewAgent:
         total_findings = sum(len(v) for v in self.findings.values())
         approval_status = "✅ APPROVED" if len(self.findings["critical"]) == 0 else "❌ NOT APPROVED"
         
-        report_content = f"""# Code Review Report: {self.branch_name}
+        with profile_phase(self.profiler, "report"):
+            with open(report_path, 'w', encoding='utf-8') as f:
+                self._write_report(f, timestamp, total_findings, approval_status)
+            # AutoFixer・CIが Markdown を再解析せずに読めるよう、同じ名前で構造化データも出力する
+            write_findings_jsonl(report_path.with_suffix(".jsonl"), self.findings)
+            write_sarif(report_path.with_suffix(".sarif"), self.findings, self.rule_engine.rules)
+        
+        if self.profiler is not None:
+            with open(report_path, 'a', encoding='utf-8') as f:
+                f.write("\n" + self.profiler.render_markdown())
+        
+        print(f"\n📊 レビューレポート作成完了: {report_path}")
+        print(f"   Total Findings: {total_findings}")
+        print(f"   Status: {approval_status}")
+        
+        if self.profiler is not None:
+            profile_path = report_path.with_suffix(".profile.json")
+            self.profiler.write_json(profile_path)
+            print(f"   Profile: {profile_path}")
+        
+        self._record_history(report_path)
+    
+    def _record_history(self, report_path, counts=None):
+        # フックが「このコミットの最新レビューは承認済みか」を1回の索引検索で判定できるよう記録する
+        if self.history is None:
+            return
+        with profile_phase(self.profiler, "git"):
+            # 作業ツリーが HEAD と異なるレビューは HEAD の内容を見ていないため、リビジョンなし（report --branch 用）で記録する。
+            # レビュー対象（削除済みを含む）、対象のない監査では追跡ファイル全体の未コミットの変更を確認する
+            commit_sha, tree_sha = None, None
+            if self.whole_commit and (self.staged or not _has_uncommitted_changes(self.target_files or None)):
+                commit_sha, tree_sha = current_revision(self.staged)
+        if counts is None:
+            counts = {severity: len(findings) for severity, findings in self.findings.items()}
+        try:
+            self.history.record(self.branch_name, commit_sha, tree_sha, self.staged, counts,
+                                time.perf_counter() - self.started, report_path)
+        except sqlite3.Error as e:
+            print(f"  ⚠️ レビュー履歴を記録できません: {e}")
+        finally:
+            self.history.close()
+    
+    def _write_report(self, f, timestamp, total_findings, approval_status):
+        # セクションごとにファイルへ直接書き出し、レポート全体の文字列を組み立てない
+        f.write(f"""# Code Review Report: {self.branch_name}
 
 ## Review Date
 {timestamp}
@@ -245,74 +983,276 @@ Total Findings: {total_findings}
 - Critical: {len(self.findings["critical"])}
 - Medium: {len(self.findings["medium"])}
 - Minor: {len(self.findings["minor"])}
-
+{self._format_baseline_summary()}
 ## Findings
 
-"""
-        
-        if self.findings["critical"]:
-            report_content += "### 🔴 Critical Issues\n\n"
-            for finding in self.findings["critical"]:
-                report_content += f"""**{finding['category'].upper()}** - {finding['file']}
-- 問題: {finding['message']}
-- 推奨: {finding['recommendation']}
-
-"""
-        
-        if self.findings["medium"]:
-            report_content += "### 🟡 Medium Issues\n\n"
-            for finding in self.findings["medium"]:
-                report_content += f"""**{finding['category'].upper()}** - {finding['file']}
-- 問題: {finding['message']}
-- 推奨: {finding['recommendation']}
-
-"""
+""")
         
-        if self.findings["minor"]:
-            report_content += "### 🟢 Minor Issues\n\n"
-            for finding in self.findings["minor"]:
-                report_content += f"""**{finding['category'].upper()}** - {finding['file']}
-- 問題: {finding['message']}
-- 推奨: {finding['recommendation']}
-
-"""
+        for severity, heading in REPORT_SECTIONS:
+            if not self.findings[severity]:
+                continue
+            f.write(f"### {heading}\n\n")
+            for finding in self.findings[severity]:
+                f.write(f"""**{finding.category.upper()}** - {self._format_location(finding)}
+- 問題: {finding.message}
+- 推奨: {finding.recommendation}
+{self._format_detail(finding)}
+""")
         
         if total_findings == 0:
-            report_content += "問題は検出されませんでした。\n\n"
+            f.write("問題は検出されませんでした。\n\n")
         
-        report_content += f"""## Approval Status
+        f.write(f"""## Approval Status
 {approval_status}
 
 ## Next Steps
-"""
+""")
         
         if len(self.findings["critical"]) > 0:
-            report_content += "1. Critical問題を優先的に修正してください\n"
+            f.write("1. Critical問題を優先的に修正してください\n")
         if len(self.findings["medium"]) > 0:
-            report_content += "2. Medium問題の修正を検討してください\n"
+            f.write("2. Medium問題の修正を検討してください\n")
         if len(self.findings["minor"]) > 0:
-            report_content += "3. Minor問題は時間があれば修正してください\n"
+            f.write("3. Minor問題は時間があれば修正してください\n")
         if total_findings == 0:
-            report_content += "1. developブランチへのマージ準備完了\n"
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-        
-        print(f"\n📊 レビューレポート作成完了: {report_path}")
-        print(f"   Total Findings: {total_findings}")
-        print(f"   Status: {approval_status}")
+            f.write("1. developブランチへのマージ準備完了\n")
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python code_reviewer.py <branch-name> [file1] [file2] ...")
-        sys.exit(1)
+def _git_root_prefix():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--show-cdup"], capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError:
+        return ""
+    return result.stdout.strip()
+
+
+def _has_uncommitted_changes(files=None):
+    # files のいずれか（None なら追跡ファイル全体）に未コミットの変更があるか。files の未追跡ファイルも変更とみなす
+    try:
+        result = subprocess.run(
+            ["git", "status", "--porcelain", "-z", "--untracked-files=all"],
+            capture_output=True,
+            encoding='utf-8',
+            errors='surrogateescape',
+            check=True
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return True
+    
+    # porcelain のパスはカレントディレクトリではなくリポジトリのルートからの相対パス
+    prefix = _git_root_prefix()
+    changed = set()
+    entries = iter(result.stdout.split("\0"))
+    for entry in entries:
+        if not entry or (files is None and entry.startswith("??")):
+            continue
+        changed.add(os.path.normpath(os.path.join(prefix, entry[3:])))
+        if "R" in entry[:2] or "C" in entry[:2]:
+            # リネーム・コピーは元のパスが次のエントリとして続く
+            changed.add(os.path.normpath(os.path.join(prefix, next(entries, ""))))
+    
+    if files is None:
+        return bool(changed)
+    return any(os.path.normpath(f) in changed for f in files)
+
+
+def _unquote_diff_path(path):
+    # タブ・改行・引用符を含むパスは core.quotePath=false でもC言語形式でクォートされる
+    if not path.startswith('"'):
+        return path
+    return codecs.escape_decode(path[1:-1].encode('utf-8'))[0].decode('utf-8', 'surrogateescape')
+
+
+def _decode_blob(file_path, size, data, max_file_size):
+    if size is None:
+        print(f"  ⚠️ Failed to read {file_path}: staged blob not found")
+        return ""
+    if data is None:
+        print(f"  ⏭️ Skipped {file_path}: サイズ上限超過 ({size:,} bytes > {max_file_size:,} bytes)")
+        return None
+    
+    try:
+        content, skip_reason = decode_source(file_path, data)
+    except UnicodeDecodeError as e:
+        print(f"  ⚠️ Failed to read {file_path}: {e}")
+        return ""
+    
+    if skip_reason:
+        print(f"  ⏭️ Skipped {file_path}: {skip_reason}")
+    return content
+
+
+def _cache_entries(findings):
+    return [[finding.rule, finding.line, finding.detail, finding.snippet_hash] for finding in findings]
+
+
+def _analyze_file(file_path, rule_engine, cache=None, regions=None, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                  profiler=None):
+    with profile_phase(profiler, "file_io"):
+        content = CodeReviewAgent._read_file(file_path, max_file_size)
+    if content is None:
+        return None, [], False
     
-    branch_name = sys.argv[1]
-    target_files = sys.argv[2:] if len(sys.argv) > 2 else None
+    # 差分モードの結果は変更範囲に依存するためキャッシュしない
+    if cache is None or regions is not None:
+        return None, rule_engine.evaluate(file_path, content, regions, profiler), False
     
-    agent = CodeReviewAgent(branch_name, target_files)
+    with profile_phase(profiler, "cache"):
+        cache_key = content_key(file_path, content, rule_engine.version)
+        entries = cache.get(cache_key)
+    if entries is not None:
+        return cache_key, rule_engine.findings_for(file_path, entries), True
+    return cache_key, rule_engine.evaluate(file_path, content, profiler=profiler), False
+
+
+_worker_caches = {}
+
+
+def _is_builtin_engine(rule_engine):
+    # ワーカープロセスは組み込みのルールエンジンしか再現できない
+    return rule_engine is RULE_ENGINE or rule_engine is BASELINE_RULE_ENGINE
+
+
+def _builtin_engine(all_occurrences):
+    return BASELINE_RULE_ENGINE if all_occurrences else RULE_ENGINE
+
+
+def _analyze_file_in_worker(file_path, regions=None, cache_dir=None, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                            all_occurrences=False):
+    cache = None
+    if cache_dir is not None:
+        cache = _worker_caches.setdefault(cache_dir, ReviewCache(cache_dir))
+    return _analyze_file(file_path, _builtin_engine(all_occurrences), cache, regions, max_file_size)
+
+
+def _analyze_batch_in_worker(file_paths, cache_dir=None, max_file_size=DEFAULT_MAX_FILE_SIZE, all_occurrences=False):
+    return [
+        (file_path, _analyze_file_in_worker(file_path, None, cache_dir, max_file_size, all_occurrences))
+        for file_path in file_paths
+    ]
+
+
+def _iter_repository_files():
+    # git ls-files の出力を少しずつ読み、.gitignore で除外されていない追跡ファイルを順に返す
+    process = subprocess.Popen(["git", "ls-files", "-z"], stdout=subprocess.PIPE)
+    pending = b""
+    try:
+        for chunk in iter(lambda: process.stdout.read(65536), b""):
+            pending += chunk
+            *paths, pending = pending.split(b"\0")
+            for path in paths:
+                file_path = path.decode('utf-8', 'surrogateescape')
+                if file_path.endswith(REVIEW_EXTENSIONS) and os.path.isfile(file_path):
+                    yield file_path
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise RuntimeError("git ls-files に失敗しました（git リポジトリ内で実行してください）")
+
+
+def _evaluate_in_worker(file_path, content, regions=None, all_occurrences=False):
+    return _builtin_engine(all_occurrences).evaluate(file_path, content, regions)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="ブランチの変更ファイルをレビューしてレポートを生成します")
+    parser.add_argument("branch_name", metavar="branch-name")
+    parser.add_argument("files", nargs="*", help="レビュー対象ファイル（省略時は develop との差分）")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="並列ワーカー数（デフォルト: CPU数）")
+    parser.add_argument("--cache-dir", help="レビューキャッシュの保存先（デフォルト: git common dir/code-review-cache）")
+    parser.add_argument("--no-cache", action="store_true", help="レビューキャッシュを使用しない")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH),
+                        help=f"既知の問題の指紋ファイル。含まれる問題は報告しない（デフォルト: {DEFAULT_BASELINE_PATH}、存在する場合のみ）")
+    parser.add_argument("--no-baseline", action="store_true", help="ベースラインを使わずすべての問題を報告する")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="今回検出したすべての問題でベースラインを作り直す（既存コードの問題を受け入れる）")
+    parser.add_argument("--no-history", action="store_true",
+                        help="レビュー結果をレビュー履歴（フックが参照する）に記録しない")
+    parser.add_argument("--diff-only", action="store_true",
+                        help="develop との差分hunk（と前後の文脈行）のみをレビューする")
+    parser.add_argument("--staged", action="store_true",
+                        help="作業ツリーではなくステージ済みの内容（index）をレビューする")
+    parser.add_argument("--max-file-size", type=float, default=DEFAULT_MAX_FILE_SIZE / (1024 * 1024),
+                        help="これより大きいファイルはスキップする（MB、0で無制限、デフォルト: 5）")
+    parser.add_argument("--context", type=int, default=3, help="--diff-only で含める前後の行数（デフォルト: 3）")
+    parser.add_argument("--profile", action="store_true",
+                        help="ルール・フェーズごとの処理時間をレポートと .profile.json に出力する（逐次実行・キャッシュ不使用）")
+    parser.add_argument("--spill-threshold", type=int, default=SPILL_THRESHOLD,
+                        help=f"メモリ上の検出結果がこの件数を超えたら一時ファイルへ退避する（0で無効、デフォルト: {SPILL_THRESHOLD}）")
+    parser.add_argument("--full-repo", action="store_true",
+                        help="git ls-files の全ファイルを監査し、検出結果を audit-*.jsonl に逐次書き出す（夜間バッチ向け）")
+    parser.add_argument("--watch", action="store_true",
+                        help="レビュー後も常駐し、変更されたファイルだけを再レビューしてレポートを更新する")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="--watch で連続した保存をまとめる待ち時間（秒、デフォルト: 0.3）")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="inotify が使えない場合の更新確認間隔（秒、デフォルト: 1.0）")
+    parser.add_argument("--poll", action="store_true", help="--watch で inotify を使わずポーリングで監視する")
+    return parser
+
+
+def load_baseline(args):
+    if args.no_baseline or args.update_baseline or not os.path.exists(args.baseline):
+        return None
+    return ReviewBaseline(args.baseline).load()
+
+
+def execute(args, agent):
+    if args.full_repo:
+        agent.audit_repository()
+        return
     agent.run_review()
+    update_baseline(args, agent)
+
+
+def update_baseline(args, agent):
+    if not args.update_baseline:
+        return
+    baseline = ReviewBaseline(args.baseline)
+    baseline.write(iter_findings(agent.findings), agent.reviewed_files)
+    count = sum(len(findings) for findings in agent.findings.values())
+    print(f"📌 ベースラインを更新しました: {args.baseline} "
+          f"({len(agent.reviewed_files)}ファイル・{count}件、合計{len(baseline.fingerprints)}件)")
+
+
+def create_agent(args, cache=None):
+    baseline = load_baseline(args)
+    # ベースラインの作成・照合時は全出現箇所を指紋化する（最初の1件だけだと同じファイルへの追加を見逃す）
+    rule_engine = BASELINE_RULE_ENGINE if baseline is not None or args.update_baseline else None
+    if args.profile:
+        # キャッシュにヒットするとルールが評価されず計測できないため、プロファイル時は常に全ファイルを解析する
+        cache = None
+    return CodeReviewAgent(args.branch_name, args.files or None, rule_engine=rule_engine, jobs=args.jobs, cache=cache,
+                           diff_only=args.diff_only, context_lines=max(0, args.context), staged=args.staged,
+                           max_file_size=int(args.max_file_size * 1024 * 1024),
+                           profiler=ReviewProfiler() if args.profile else None,
+                           history=None if args.no_history else ReviewHistory(args.cache_dir),
+                           baseline=baseline, spill_threshold=max(0, args.spill_threshold))
+
+
+def parse_args(parser, argv=None):
+    # CLI と常駐レビューサーバーで同じ組み合わせチェックを行う
+    args = parser.parse_intermixed_args(argv)
+    if args.watch and args.staged:
+        parser.error("--watch と --staged は同時に指定できません")
+    if args.update_baseline and (args.watch or args.diff_only):
+        parser.error("--update-baseline は --watch・--diff-only と同時に指定できません")
+    if args.full_repo and (args.files or args.staged or args.diff_only or args.watch or args.update_baseline):
+        parser.error("--full-repo はファイル指定・--staged・--diff-only・--watch・--update-baseline と同時に指定できません")
+    return args
+
+
+def main():
+    parser = build_parser()
+    args = parse_args(parser)
+    
+    cache = None if args.no_cache or args.profile else ReviewCache(args.cache_dir)
+    agent = create_agent(args, cache)
+    if args.watch:
+        agent.watch(args.debounce, args.poll_interval, use_inotify=not args.poll)
+    else:
+        execute(args, agent)
 
 
 if __name__ == "__main__":
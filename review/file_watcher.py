@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+IGNORED_DIRS = {"node_modules", "review-reports", "__pycache__"}
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _iter_directories(root):
+    for directory, dirs, _ in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in IGNORED_DIRS]
+        yield directory
+
+
+def _iter_files(root):
+    for directory in _iter_directories(root):
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifyBackend:
+    name = "inotify"
+    
+    def __init__(self, root, libc):
+        self.root = root
+        self.libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.watches = {}
+        try:
+            for directory in _iter_directories(root):
+                self._add_watch(directory)
+        except OSError:
+            self.close()
+            raise
+    
+    def _add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            # 監視中に削除されたディレクトリは無視し、監視数の上限（ENOSPC）等はポーリングに切り替える
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, os.strerror(error))
+        self.watches[wd] = directory
+    
+    def poll(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            
+            if mask & IN_Q_OVERFLOW:
+                # イベントの取りこぼしが発生したため全ファイルを変更扱いにする
+                changed.update(_iter_files(self.root))
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith(b".") and os.fsdecode(name) not in IGNORED_DIRS:
+                    for new_directory in _iter_directories(path):
+                        self._add_watch(new_directory)
+                    changed.update(_iter_files(path))
+                continue
+            changed.add(path)
+        return changed
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class _PollingBackend:
+    name = "polling"
+    
+    def __init__(self, root, interval):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self._scan()
+    
+    def _scan(self):
+        snapshot = {}
+        for path in _iter_files(self.root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def poll(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+            
+            snapshot = self._scan()
+            changed = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+            changed.update(path for path in self.snapshot if path not in snapshot)
+            self.snapshot = snapshot
+            
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+    
+    def close(self):
+        pass
+
+
+class FileWatcher:
+    def __init__(self, root=".", interval=1.0, use_inotify=True):
+        self.root = root
+        libc = _load_libc() if use_inotify else None
+        self.backend = None
+        if libc is not None:
+            try:
+                self.backend = _InotifyBackend(root, libc)
+            except OSError as e:
+                print(f"  ⚠️ inotify を使用できないためポーリングで監視します: {e}")
+        if self.backend is None:
+            self.backend = _PollingBackend(root, interval)
+    
+    @property
+    def backend_name(self):
+        return self.backend.name
+    
+    def wait(self, debounce=0.3):
+        # 最初の変更を待ち、debounce 秒間変更が止むまでまとめて受け取る（連続保存を1回の再レビューにする）
+        changed = set()
+        while not changed:
+            changed = self.backend.poll(None)
+        while True:
+            more = self.backend.poll(debounce)
+            if not more:
+                break
+            changed |= more
+        return sorted(os.path.normpath(os.path.relpath(path, self.root)) for path in changed)
+    
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import pickle
+import tempfile
+
+from report_formats import SEVERITIES
+
+# これを超える件数の検出結果がメモリ上に溜まったら一時ファイルへ退避する（0で無効）
+SPILL_THRESHOLD = 100000
+
+# ルールID -> (severity, category, message, recommendation)。検出結果はIDだけを持ち、文言はここを参照する
+MESSAGE_CATALOG = {}
+
+
+def register_rules(rules):
+    for rule in rules:
+        MESSAGE_CATALOG[rule["id"]] = (rule["severity"], rule["category"], rule["message"], rule["recommendation"])
+
+
+class Finding:
+    __slots__ = ("rule", "file", "line", "detail", "snippet_hash", "fingerprint")
+    
+    def __init__(self, rule, file, line=None, detail=None, snippet_hash=None, fingerprint=None):
+        # 同じルールID・ファイルパスの文字列は intern して1つのオブジェクトを共有する
+        self.rule = sys.intern(rule)
+        self.file = sys.intern(file)
+        self.line = line
+        self.detail = detail
+        self.snippet_hash = snippet_hash
+        self.fingerprint = fingerprint
+    
+    def __reduce__(self):
+        # ワーカープロセス・一時ファイルから復元するときも __init__ を通して intern し直す
+        return Finding, (self.rule, self.file, self.line, self.detail, self.snippet_hash, self.fingerprint)
+    
+    @property
+    def severity(self):
+        return MESSAGE_CATALOG[self.rule][0]
+    
+    @property
+    def category(self):
+        return MESSAGE_CATALOG[self.rule][1]
+    
+    @property
+    def message(self):
+        return MESSAGE_CATALOG[self.rule][2]
+    
+    @property
+    def recommendation(self):
+        return MESSAGE_CATALOG[self.rule][3]
+
+
+class FindingBucket:
+    def __init__(self):
+        self.items = []
+        self.spill_file = None
+        self.spilled_chunks = []
+        self.spilled_count = 0
+    
+    def append(self, finding):
+        self.items.append(finding)
+    
+    def spill(self):
+        if not self.items:
+            return
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(prefix="review-findings-")
+        self.spill_file.seek(0, os.SEEK_END)
+        self.spilled_chunks.append(self.spill_file.tell())
+        pickle.dump(self.items, self.spill_file, pickle.HIGHEST_PROTOCOL)
+        self.spilled_count += len(self.items)
+        self.items = []
+    
+    def __len__(self):
+        return self.spilled_count + len(self.items)
+    
+    def __bool__(self):
+        return len(self) > 0
+    
+    def __iter__(self):
+        # 退避済みのチャンクを書き込んだ順に読み戻してから、メモリ上の残りを返す
+        for offset in list(self.spilled_chunks):
+            self.spill_file.seek(offset)
+            yield from pickle.load(self.spill_file)
+        yield from self.items
+    
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+        self.spilled_chunks = []
+        self.spilled_count = 0
+        self.items = []
+
+
+class FindingStore(dict):
+    # severity -> FindingBucket。メモリ上の件数が spill_threshold に達したら全バケットを退避する
+    def __init__(self, spill_threshold=SPILL_THRESHOLD):
+        super().__init__((severity, FindingBucket()) for severity in SEVERITIES)
+        self.spill_threshold = spill_threshold
+        self.in_memory = 0
+    
+    def add(self, finding):
+        self[finding.severity].append(finding)
+        self.in_memory += 1
+        if self.spill_threshold and self.in_memory >= self.spill_threshold:
+            for bucket in self.values():
+                bucket.spill()
+            self.in_memory = 0
+    
+    @property
+    def spilled(self):
+        return sum(bucket.spilled_count for bucket in self.values())
+    
+    def close(self):
+        for bucket in self.values():
+            bucket.close()
+        self.in_memory = 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import subprocess
+import threading
+
+
+class CatFileBatch:
+    # 1つの `git cat-file --batch` プロセスを使い回してオブジェクトを読み出す
+    def __init__(self, cwd=None):
+        self.process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=cwd
+        )
+    
+    def read(self, object_name, max_size=None):
+        self.process.stdin.write(object_name.encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        return self._read_response(max_size)
+    
+    def iter_objects(self, object_names, max_size=None):
+        # 要求の書き込みを別スレッドで行い、パイプが詰まらないよう応答を読み続ける
+        # 各要素は (サイズ, データ)。存在しない場合は (None, None)、max_size 超過時はデータが None
+        object_names = list(object_names)
+        
+        def write_requests():
+            try:
+                for object_name in object_names:
+                    self.process.stdin.write(object_name.encode('utf-8') + b'\n')
+                self.process.stdin.flush()
+            except BrokenPipeError:
+                pass
+        
+        writer = threading.Thread(target=write_requests, daemon=True)
+        writer.start()
+        try:
+            for _ in object_names:
+                yield self._read_response(max_size)
+        finally:
+            writer.join()
+    
+    def _read_response(self, max_size=None):
+        header = self.process.stdout.readline()
+        if not header:
+            raise RuntimeError("git cat-file --batch terminated unexpectedly")
+        if header.endswith(b' missing\n') or header.endswith(b' ambiguous\n'):
+            return None, None
+        
+        size = int(header.split()[2])
+        if max_size is not None and size > max_size:
+            self._discard(size + 1)
+            return size, None
+        
+        data = self.process.stdout.read(size)
+        self.process.stdout.read(1)
+        return size, data
+    
+    def _discard(self, size):
+        while size > 0:
+            chunk = self.process.stdout.read(min(size, 1024 * 1024))
+            if not chunk:
+                break
+            size -= len(chunk)
+    
+    def close(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            self.process.stdin.close()
+        self.process.wait()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
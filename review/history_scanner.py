@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import subprocess
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from code_reviewer import REVIEW_RULES, RuleEngine
+from git_objects import CatFileBatch
+from review_cache import default_cache_dir
+from source_reader import DEFAULT_MAX_FILE_SIZE, decode_source
+from report_formats import SEVERITIES
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# 過去のコミットに残った秘密情報を探すため、セキュリティのルールだけを評価する
+SECURITY_RULE_ENGINE = RuleEngine([rule for rule in REVIEW_RULES if rule["category"] == "security"])
+# ワーカーに渡すblob数。処理済みコミットの記録もこの単位で行う
+SCAN_BATCH_SIZE = 256
+NULL_SHA = "0" * 40
+
+
+def iter_history(revision_range):
+    # git log --raw を逐次読み、(コミット, [(blob, パス), ...]) を古い順に返す（-z なのでパスはクォートされない）
+    # -m: マージコミットも各親との差分を出力させ、競合解決で入ったblobも対象にする（同じblobは重複除去される）
+    process = subprocess.Popen(
+        ["git", "log", "--reverse", "--raw", "-m", "--no-abbrev", "--no-renames", "-z", "--format=commit %H",
+         revision_range],
+        stdout=subprocess.PIPE
+    )
+    commit = None
+    blobs = []
+    pending = b""
+    meta = None
+    try:
+        for chunk in iter(lambda: process.stdout.read(65536), b""):
+            pending += chunk
+            *tokens, pending = pending.split(b"\0")
+            for token in tokens:
+                if meta is not None:
+                    # :旧モード 新モード 旧blob 新blob 状態。削除（新blobが0）とサブモジュール（160000）は対象外
+                    _, new_mode, _, new_sha, _ = meta.split()
+                    if new_sha != NULL_SHA.encode() and new_mode != b"160000":
+                        blobs.append((new_sha.decode('ascii'), token.decode('utf-8', 'surrogateescape')))
+                    meta = None
+                    continue
+                token = token.lstrip(b"\n")
+                if token.startswith(b":"):
+                    meta = token
+                elif token.startswith(b"commit "):
+                    # -m ではマージコミットが親ごとに続けて出力されるため、1つのコミットにまとめる
+                    sha = token[7:].decode('ascii')
+                    if sha == commit:
+                        continue
+                    if commit is not None:
+                        yield commit, blobs
+                    commit = sha
+                    blobs = []
+        if commit is not None:
+            yield commit, blobs
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"git log に失敗しました: {revision_range}")
+
+
+_worker_cat_file = None
+
+
+def _scan_blobs_in_worker(items, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    # ワーカーごとに git cat-file --batch を1本起動して使い回す
+    global _worker_cat_file
+    if _worker_cat_file is None:
+        _worker_cat_file = CatFileBatch()
+    return scan_blobs(_worker_cat_file, items, max_file_size)
+
+
+def scan_blobs(cat_file, items, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    results = []
+    objects = cat_file.iter_objects([blob_sha for blob_sha, _, _ in items], max_file_size or None)
+    for (blob_sha, commit, path), (size, data) in zip(items, objects):
+        findings = []
+        if data:
+            try:
+                content, skip_reason = decode_source(path, data)
+            except UnicodeDecodeError:
+                content = None
+            if content is not None:
+                findings = [
+                    [finding.rule, finding.line, finding.detail]
+                    for finding in SECURITY_RULE_ENGINE.evaluate(path, content)
+                ]
+        results.append((blob_sha, commit, path, findings))
+    return results
+
+
+class HistoryScanState:
+    def __init__(self, state_dir=None):
+        self.state_dir = Path(state_dir) if state_dir else default_cache_dir()
+        self.db_path = self.state_dir / "history-scan.db"
+        self.conn = None
+    
+    def connect(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scan_state (
+                ref TEXT PRIMARY KEY,
+                last_commit TEXT NOT NULL,
+                rule_version TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, rule_version TEXT NOT NULL) WITHOUT ROWID")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS findings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                blob_sha TEXT NOT NULL,
+                commit_sha TEXT NOT NULL,
+                path TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                line INTEGER,
+                detail TEXT
+            )
+        """)
+        # save_batch の blob ごとの DELETE が全件走査にならないようにする
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_findings_blob ON findings (blob_sha)")
+        self.conn.commit()
+    
+    def last_commit(self, ref, rule_version):
+        row = self.conn.execute(
+            "SELECT last_commit, rule_version FROM scan_state WHERE ref = ?", (ref,)
+        ).fetchone()
+        if row is None or row[1] != rule_version:
+            return None
+        return row[0]
+    
+    def is_scanned(self, blob_sha, rule_version):
+        row = self.conn.execute("SELECT rule_version FROM blobs WHERE sha = ?", (blob_sha,)).fetchone()
+        return row is not None and row[0] == rule_version
+    
+    def save_batch(self, ref, rule_version, results, last_commit):
+        # blob・検出結果・再開位置を1トランザクションで記録し、中断しても重複や取りこぼしが出ないようにする
+        with self.conn:
+            self.conn.executemany("DELETE FROM findings WHERE blob_sha = ?", [(blob_sha,) for blob_sha, _, _, _ in results])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO blobs (sha, rule_version) VALUES (?, ?)",
+                [(blob_sha, rule_version) for blob_sha, _, _, _ in results]
+            )
+            self.conn.executemany(
+                "INSERT INTO findings (blob_sha, commit_sha, path, rule, line, detail) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (blob_sha, commit, path, rule_id, line, detail)
+                    for blob_sha, commit, path, findings in results
+                    for rule_id, line, detail in findings
+                ]
+            )
+            if last_commit is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO scan_state (ref, last_commit, rule_version, updated) VALUES (?, ?, ?, ?)",
+                    (ref, last_commit, rule_version, time.time())
+                )
+    
+    def reset(self, ref):
+        with self.conn:
+            self.conn.execute("DELETE FROM scan_state WHERE ref = ?", (ref,))
+    
+    def scanned_refs(self):
+        return [row[0] for row in self.conn.execute("SELECT ref FROM scan_state ORDER BY ref")]
+    
+    def iter_findings(self):
+        return self.conn.execute(
+            "SELECT commit_sha, path, rule, line, detail, blob_sha FROM findings ORDER BY id"
+        )
+    
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+
+class HistoryScanner:
+    def __init__(self, ref="HEAD", state=None, jobs=1, max_file_size=DEFAULT_MAX_FILE_SIZE, full=False):
+        self.ref = ref
+        self.state = state or HistoryScanState()
+        self.jobs = max(1, jobs or 1)
+        self.max_file_size = max_file_size
+        self.full = full
+        self.rule_version = SECURITY_RULE_ENGINE.version
+        self.stats = {"commits": 0, "blobs": 0, "skipped_blobs": 0, "findings": 0}
+        # 投入済みで未記録のblob（記録後はDBで重複を判定するため、保持するのは処理中の分だけ）
+        self.queued = set()
+    
+    def run(self):
+        self.state.connect()
+        try:
+            if self.full:
+                self.state.reset(self.ref)
+            last_commit = self.state.last_commit(self.ref, self.rule_version)
+            revision_range = f"{last_commit}..{self.ref}" if last_commit else self.ref
+            if last_commit:
+                print(f"🔁 前回の続きから走査します: {last_commit[:12]}..{self.ref}")
+            else:
+                print(f"🔍 履歴全体を走査します: {self.ref}")
+            
+            start = time.perf_counter()
+            for results, checkpoint in self._scan(self._iter_batches(iter_history(revision_range))):
+                self.state.save_batch(self.ref, self.rule_version, results, checkpoint)
+                self.queued.difference_update(blob_sha for blob_sha, _, _, _ in results)
+                self.stats["blobs"] += len(results)
+                self.stats["findings"] += sum(len(findings) for _, _, _, findings in results)
+            self.stats["seconds"] = time.perf_counter() - start
+            
+            print(f"  ✅ {self.stats['commits']:,}コミット / {self.stats['blobs']:,} blob を走査"
+                  f"（走査済みblob {self.stats['skipped_blobs']:,}件をスキップ、{self.stats['seconds']:.1f}s）")
+            return self.write_report()
+        finally:
+            self.state.close()
+    
+    def _iter_batches(self, history):
+        # 各バッチには「そのバッチまでで全blobを走査し終えたコミット」を再開位置として添える
+        batch = []
+        completed = None
+        for commit, blobs in history:
+            self.stats["commits"] += 1
+            for blob_sha, path in blobs:
+                if blob_sha in self.queued or self.state.is_scanned(blob_sha, self.rule_version):
+                    self.stats["skipped_blobs"] += 1
+                    continue
+                self.queued.add(blob_sha)
+                batch.append((blob_sha, commit, path))
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    yield batch, completed
+                    batch = []
+            completed = commit
+            if self.stats["commits"] % 1000 == 0:
+                print(f"  📜 {self.stats['commits']:,}コミット処理済み")
+        yield batch, completed
+    
+    def _scan(self, batches):
+        if self.jobs == 1:
+            with CatFileBatch() as cat_file:
+                for batch, checkpoint in batches:
+                    yield scan_blobs(cat_file, batch, self.max_file_size), checkpoint
+            return
+        
+        # 再開位置を正しく記録するため、結果は投入順に受け取る（未処理はワーカー数の2倍まで）
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            in_flight = deque()
+            for batch, checkpoint in batches:
+                if len(in_flight) >= self.jobs * 2:
+                    future, pending_checkpoint = in_flight.popleft()
+                    yield future.result(), pending_checkpoint
+                in_flight.append((executor.submit(_scan_blobs_in_worker, batch, self.max_file_size), checkpoint))
+            while in_flight:
+                future, pending_checkpoint = in_flight.popleft()
+                yield future.result(), pending_checkpoint
+    
+    def write_report(self):
+        report_dir = Path("review-reports")
+        report_dir.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d")
+        report_path = report_dir / f"history-scan-{timestamp}.md"
+        findings_path = report_path.with_suffix(".jsonl")
+        
+        counts = {severity: 0 for severity in SEVERITIES}
+        # 走査済みのblobは全refで共有するため、レポートは ref で絞り込まずリポジトリ全体の検出結果を出す
+        refs = ", ".join(self.state.scanned_refs()) or self.ref
+        # 検出結果はDBから1件ずつ読みながら書き出す
+        with open(findings_path, 'w', encoding='utf-8') as jsonl, open(report_path, 'w', encoding='utf-8') as report:
+            report.write(f"# Git History Secret Scan: {self.ref}\n\n## Scan Date\n{timestamp}\n\n"
+                         f"## Scope\nリポジトリ全体（これまでに走査したref: {refs}）\n"
+                         f"各blobは最初に見つかったコミットで1回だけ記録され、{self.ref} 以外のrefの履歴の検出結果も含みます。\n\n"
+                         "## Findings\n\n")
+            for commit, path, rule_id, line, detail, blob_sha in self.state.iter_findings():
+                rule = SECURITY_RULE_ENGINE.rules_by_id.get(rule_id)
+                if rule is None:
+                    continue
+                counts[rule["severity"]] += 1
+                location = path if line is None else f"{path}:{line}"
+                report.write(f"**{rule['category'].upper()}** - {location} (commit {commit[:12]}, blob {blob_sha[:12]})\n"
+                             f"- 問題: {rule['message']}\n- 推奨: {rule['recommendation']}\n")
+                if detail is not None:
+                    report.write(f"- 詳細: {detail}\n")
+                report.write("\n")
+                jsonl.write(json.dumps({
+                    "rule": rule_id, "severity": rule["severity"], "category": rule["category"],
+                    "file": path, "line": line, "commit": commit, "blob": blob_sha,
+                    "message": rule["message"], "recommendation": rule["recommendation"], "detail": detail
+                }, ensure_ascii=False) + "\n")
+            
+            total_findings = sum(counts.values())
+            if total_findings == 0:
+                report.write("問題は検出されませんでした。\n\n")
+            report.write(f"## Summary\nTotal Findings: {total_findings}\n"
+                         f"- Critical: {counts['critical']}\n- Medium: {counts['medium']}\n- Minor: {counts['minor']}\n\n"
+                         "履歴から削除済みの秘密情報も無効化（ローテーション）が必要です。\n")
+        
+        print(f"\n📊 履歴スキャンレポート作成完了: {report_path}")
+        print(f"   Scope: リポジトリ全体（走査済みref: {refs}）")
+        print(f"   Total Findings: {total_findings}（今回の走査で {self.stats['findings']}件）")
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="git の全履歴に含まれるblobをセキュリティルールで走査します（前回の続きから再開）")
+    parser.add_argument("ref", nargs="?", default="HEAD", help="走査するブランチ・コミット（デフォルト: HEAD）")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="並列ワーカー数（デフォルト: CPU数）")
+    parser.add_argument("--full", action="store_true", help="再開位置を破棄して履歴の最初から走査する（走査済みblobは再利用）")
+    parser.add_argument("--state-dir", help="走査状態の保存先（デフォルト: git common dir/code-review-cache）")
+    parser.add_argument("--max-file-size", type=float, default=DEFAULT_MAX_FILE_SIZE / (1024 * 1024),
+                        help="これより大きいblobはスキップする（MB、0で無制限、デフォルト: 5）")
+    args = parser.parse_args()
+    
+    scanner = HistoryScanner(args.ref, HistoryScanState(args.state_dir), args.jobs,
+                             int(args.max_file_size * 1024 * 1024), args.full)
+    counts = scanner.run()
+    sys.exit(1 if counts["critical"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import ast
+import re
+
+SHORT_NAME = re.compile(r'[a-z]{1,2}')
+LOWERCASE_CLASS_NAME = re.compile(r'[a-z]')
+QUERY_METHODS = {"query", "execute", "executemany", "filter", "filter_by", "raw"}
+
+
+def analyze_python(content):
+    # 戻り値: {ルールID: [(行番号, 詳細), ...]}。構文エラー時は None（正規表現ルールにフォールバック）
+    try:
+        tree = ast.parse(content)
+        visitor = _PythonRuleVisitor()
+        visitor.visit(tree)
+    except (SyntaxError, ValueError, RecursionError):
+        return None
+    
+    occurrences = visitor.occurrences
+    # ネストループは深い順に並べ、最も深いものを代表として報告する
+    if "nested-loop" in occurrences:
+        occurrences["nested-loop"] = [
+            (line, f"ループの深さ: {depth}（O(N^{depth})の可能性）")
+            for line, depth in sorted(occurrences["nested-loop"], key=lambda occurrence: -occurrence[1])
+        ]
+    return occurrences
+
+
+class _PythonRuleVisitor(ast.NodeVisitor):
+    # 1回の走査ですべてのPythonルールを判定する
+    def __init__(self):
+        self.occurrences = {}
+        self.loop_depth = 0
+        self.try_depth = 0
+        self.loop_root = None
+        self.max_loop_depth = 0
+        self.managed_calls = set()
+    
+    def _record(self, rule_id, node, detail=None):
+        self.occurrences.setdefault(rule_id, []).append((node.lineno, detail))
+    
+    def visit_FunctionDef(self, node):
+        if SHORT_NAME.fullmatch(node.name):
+            self._record("short-function-name", node)
+        self._visit_scope(node)
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_ClassDef(self, node):
+        if LOWERCASE_CLASS_NAME.match(node.name):
+            self._record("class-naming", node)
+        self._visit_scope(node)
+    
+    def visit_Lambda(self, node):
+        self._visit_scope(node)
+    
+    def _visit_scope(self, node):
+        # 関数・クラス定義はループの外側とは独立したスコープとして数える
+        saved = (self.loop_depth, self.loop_root, self.max_loop_depth)
+        self.loop_depth, self.loop_root, self.max_loop_depth = 0, None, 0
+        self.generic_visit(node)
+        self.loop_depth, self.loop_root, self.max_loop_depth = saved
+    
+    def visit_For(self, node):
+        # イテレータ式はループの外で1回だけ評価される
+        self.visit(node.target)
+        self.visit(node.iter)
+        self._visit_loop_body(node, 1, node.body)
+        for child in node.orelse:
+            self.visit(child)
+    
+    visit_AsyncFor = visit_For
+    
+    def visit_While(self, node):
+        self.visit(node.test)
+        self._visit_loop_body(node, 1, node.body)
+        for child in node.orelse:
+            self.visit(child)
+    
+    def _visit_comprehension(self, node):
+        self.visit(node.generators[0].iter)
+        inner = [generator.iter for generator in node.generators[1:]]
+        inner += [condition for generator in node.generators for condition in generator.ifs]
+        inner += [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        self._visit_loop_body(node, len(node.generators), inner)
+    
+    visit_ListComp = _visit_comprehension
+    visit_SetComp = _visit_comprehension
+    visit_DictComp = _visit_comprehension
+    visit_GeneratorExp = _visit_comprehension
+    
+    def _visit_loop_body(self, node, levels, body):
+        is_root = self.loop_root is None
+        if is_root:
+            self.loop_root = node
+            self.max_loop_depth = 0
+        
+        self.loop_depth += levels
+        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
+        for child in body:
+            self.visit(child)
+        self.loop_depth -= levels
+        
+        if is_root:
+            if self.max_loop_depth >= 2:
+                self._record("nested-loop", node, self.max_loop_depth)
+            self.loop_root = None
+    
+    def visit_With(self, node):
+        for item in node.items:
+            self.managed_calls.add(id(item.context_expr))
+        self.generic_visit(node)
+    
+    visit_AsyncWith = visit_With
+    
+    def visit_Try(self, node):
+        self.try_depth += 1
+        self.generic_visit(node)
+        self.try_depth -= 1
+    
+    visit_TryStar = visit_Try
+    
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self._record("bare-except", node)
+        self.generic_visit(node)
+    
+    def visit_ImportFrom(self, node):
+        if any(alias.name == '*' for alias in node.names):
+            self._record("wildcard-import", node)
+    
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id == "eval":
+                self._record("eval-usage", node)
+            elif func.id == "open" and self.try_depth == 0 and id(node) not in self.managed_calls:
+                self._record("open-without-try", node)
+        elif isinstance(func, ast.Attribute) and func.attr in QUERY_METHODS and self.loop_depth > 0:
+            self._record("n-plus-one-query", node)
+        self.generic_visit(node)
+
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import textwrap
+
+SEVERITIES = ("critical", "medium", "minor")
+SARIF_LEVELS = {
+    "critical": "error",
+    "medium": "warning",
+    "minor": "note"
+}
+FINDING_FIELDS = ("rule", "severity", "category", "file", "line", "message", "recommendation", "detail", "fingerprint")
+
+
+def iter_findings(findings_by_severity):
+    for severity in SEVERITIES:
+        yield from findings_by_severity[severity]
+
+
+def write_finding_record(f, finding):
+    record = {field: getattr(finding, field) for field in FINDING_FIELDS}
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def write_findings_jsonl(path, findings_by_severity):
+    with open(path, 'w', encoding='utf-8') as f:
+        for finding in iter_findings(findings_by_severity):
+            write_finding_record(f, finding)
+
+
+def load_findings_jsonl(path, severity=None):
+    findings = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            finding = json.loads(line)
+            if severity is None or finding["severity"] == severity:
+                findings.append(finding)
+    return findings
+
+
+def write_sarif(path, findings_by_severity, rules):
+    sarif_rules = [
+        {
+            "id": rule["id"],
+            "shortDescription": {"text": rule["message"]},
+            "help": {"text": rule["recommendation"]},
+            "defaultConfiguration": {"level": SARIF_LEVELS[rule["severity"]]},
+            "properties": {"category": rule["category"]}
+        }
+        for rule in rules
+    ]
+    rule_index = {rule["id"]: index for index, rule in enumerate(rules)}
+    
+    sarif = {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [
+            {
+                "tool": {
+                    "driver": {
+                        "name": "code-reviewer",
+                        "rules": sarif_rules
+                    }
+                },
+                "results": []
+            }
+        ]
+    }
+    
+    # results は1件ずつ直列化して書き出し、全件のリストをメモリ上に作らない（出力は json.dump と同一）
+    head, tail = json.dumps(sarif, ensure_ascii=False, indent=2).rsplit('"results": []', 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(head + '"results": [')
+        separator = "\n"
+        for finding in iter_findings(findings_by_severity):
+            result = json.dumps(_sarif_result(finding, rule_index), ensure_ascii=False, indent=2)
+            f.write(separator + textwrap.indent(result, " " * 8))
+            separator = ",\n"
+        f.write(("]" if separator == "\n" else "\n      ]") + tail)
+
+
+def _sarif_result(finding, rule_index):
+    location = {"artifactLocation": {"uri": finding.file.replace("\\", "/")}}
+    if finding.line is not None:
+        location["region"] = {"startLine": finding.line}
+    
+    message = finding.message
+    if finding.detail:
+        message += f" ({finding.detail})"
+    
+    return {
+        "ruleId": finding.rule,
+        "ruleIndex": rule_index[finding.rule],
+        "level": SARIF_LEVELS[finding.severity],
+        "message": {"text": message},
+        "locations": [{"physicalLocation": location}]
+    }
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_BASELINE_PATH = Path(".review-baseline.json")
+BASELINE_FORMAT_VERSION = 1
+
+
+def snippet_hash(line_text):
+    # インデント・空白の違いでは変わらないよう正規化してからハッシュする
+    normalized = " ".join(line_text.split())
+    return hashlib.sha1(normalized.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+
+
+def baseline_path(file_path):
+    return Path(os.path.normpath(file_path)).as_posix()
+
+
+def finding_fingerprint(finding, occurrence=0):
+    # 行番号は含めない（前後の行の追加・削除で変わらないようにする）
+    file_path = baseline_path(finding.file)
+    payload = f"{finding.rule}\0{file_path}\0{finding.snippet_hash or ''}\0{occurrence}"
+    return hashlib.sha256(payload.encode('utf-8', 'surrogateescape')).hexdigest()[:20]
+
+
+class ReviewBaseline:
+    def __init__(self, path=DEFAULT_BASELINE_PATH):
+        self.path = Path(path)
+        self.fingerprints = set()
+    
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.fingerprints = set(data.get("fingerprints", {}))
+        return self
+    
+    def write(self, findings, reviewed_files=None):
+        # reviewed_files を指定した場合は、そのファイルの指紋だけを置き換えて他のファイルの指紋は残す
+        entries = {}
+        if reviewed_files is not None and self.path.exists():
+            reviewed = {baseline_path(file_path) for file_path in reviewed_files}
+            with open(self.path, 'r', encoding='utf-8') as f:
+                existing = json.load(f).get("fingerprints", {})
+            entries = {
+                fingerprint: entry for fingerprint, entry in existing.items()
+                if baseline_path(entry["file"]) not in reviewed
+            }
+        entries.update(
+            (finding.fingerprint, {"rule": finding.rule, "file": finding.file, "line": finding.line})
+            for finding in findings
+        )
+        data = {
+            "version": BASELINE_FORMAT_VERSION,
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "fingerprints": dict(sorted(entries.items()))
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        self.fingerprints = set(entries)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import subprocess
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def default_cache_dir(cwd=None):
+    env_dir = os.environ.get("CODE_REVIEW_CACHE_DIR")
+    if env_dir:
+        return Path(env_dir)
+    
+    # git common dir は main / -review / -ui-test の全worktreeで共有される
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--git-common-dir"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=cwd
+        )
+        return (Path(cwd or ".") / result.stdout.strip()).resolve() / "code-review-cache"
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return Path(".review-cache")
+
+
+def content_key(file_path, content, rule_version):
+    digest = hashlib.sha256(content.encode('utf-8', 'surrogateescape')).hexdigest()
+    return f"{rule_version}:{Path(file_path).suffix}:{digest}"
+
+
+def blob_key(file_path, blob_sha, rule_version):
+    return f"{rule_version}:{Path(file_path).suffix}:git-{blob_sha}"
+
+
+class ReviewCache:
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.db_path = self.cache_dir / "findings.db"
+        self.max_entries = max_entries
+        self.conn = None
+    
+    def connect(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS findings (
+                key TEXT PRIMARY KEY,
+                rules TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_findings_last_used ON findings (last_used)")
+        self.conn.commit()
+    
+    def get(self, key):
+        if self.conn is None:
+            self.connect()
+        
+        row = self.conn.execute("SELECT rules FROM findings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def update(self, entries, touched_keys=()):
+        if self.conn is None:
+            self.connect()
+        
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO findings (key, rules, last_used) VALUES (?, ?, ?)",
+                [(key, json.dumps(rule_ids), now) for key, rule_ids in entries]
+            )
+            self.conn.executemany(
+                "UPDATE findings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in touched_keys]
+            )
+            self._evict()
+    
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM findings").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM findings WHERE key IN (SELECT key FROM findings ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+    
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
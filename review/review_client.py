@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# 常駐レビューサーバーのクライアント（起動を速くするため標準ライブラリの最小限のみimportする）
+import os
+import sys
+import json
+import socket
+import tempfile
+
+# フック実行中は git が GIT_INDEX_FILE 等を設定するため、サーバー側にも引き継ぐ
+FORWARDED_ENV_PREFIXES = ("GIT_", "CODE_REVIEW_")
+CONNECT_TIMEOUT = 0.5
+# 常駐・長時間かかるモードはサーバーを占有してフックのレビューを待たせないよう、常にプロセス内で実行する
+IN_PROCESS_OPTIONS = ("--watch", "--full-repo")
+
+
+def default_socket_path():
+    env_path = os.environ.get("CODE_REVIEW_SOCKET")
+    if env_path:
+        return env_path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    user_id = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "user")
+    return os.path.join(runtime_dir, f"code-review-{user_id}.sock")
+
+
+def send_request(request, socket_path=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path or default_socket_path())
+        sock.settimeout(None)
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+        
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def _runs_in_process(argv):
+    # argparse の省略形（--wat 等）も同じオプションとして扱う
+    for arg in argv:
+        if arg == "--":
+            break
+        name = arg.split("=", 1)[0]
+        if len(name) > 2 and name.startswith("--") and any(option.startswith(name) for option in IN_PROCESS_OPTIONS):
+            return True
+    return False
+
+
+def review_via_server(argv):
+    if not hasattr(socket, "AF_UNIX") or _runs_in_process(argv):
+        return None
+    
+    env = {key: value for key, value in os.environ.items() if key.startswith(FORWARDED_ENV_PREFIXES)}
+    try:
+        response = send_request({"command": "review", "cwd": os.getcwd(), "argv": argv, "env": env})
+    except (OSError, ValueError):
+        return None
+    
+    if response.get("status") != "ok":
+        return None
+    
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
+
+
+def main():
+    exit_code = review_via_server(sys.argv[1:])
+    if exit_code is None:
+        # サーバーが起動していない・応答できない・サーバーで扱わないモードの場合はプロセス内でレビューする
+        import code_reviewer
+        code_reviewer.main()
+        return
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from review_cache import default_cache_dir
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+# status コマンドの終了コード（フックから判定に使う）
+EXIT_APPROVED = 0
+EXIT_NOT_APPROVED = 1
+EXIT_NOT_FOUND = 2
+
+
+def _git_output(*args):
+    try:
+        result = subprocess.run(["git", *args], capture_output=True, text=True, check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return result.stdout.strip() or None
+
+
+def current_revision(staged=False):
+    # ステージ済みレビューはコミット前なので HEAD ではなく index の tree で記録する（コミット後の tree と一致する）
+    if staged:
+        return None, _git_output("write-tree")
+    return _git_output("rev-parse", "--verify", "--quiet", "HEAD"), None
+
+
+def resolve_revision(revision):
+    commit_sha = _git_output("rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}")
+    tree_sha = _git_output("rev-parse", "--verify", "--quiet", f"{revision}^{{tree}}")
+    return commit_sha, tree_sha
+
+
+class ReviewHistory:
+    def __init__(self, history_dir=None):
+        self.history_dir = Path(history_dir) if history_dir else default_cache_dir()
+        self.db_path = self.history_dir / "history.db"
+        self.conn = None
+    
+    def connect(self):
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                branch TEXT NOT NULL,
+                commit_sha TEXT,
+                tree_sha TEXT,
+                staged INTEGER NOT NULL,
+                reviewed_at REAL NOT NULL,
+                critical INTEGER NOT NULL,
+                medium INTEGER NOT NULL,
+                minor INTEGER NOT NULL,
+                approved INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                report_path TEXT NOT NULL
+            )
+        """)
+        # 索引の各エントリは rowid 順に並ぶため、「最新の1件」は ORDER BY id DESC LIMIT 1 で索引だけで引ける
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_commit ON reviews (commit_sha)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_tree ON reviews (tree_sha)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_branch ON reviews (branch)")
+        self.conn.commit()
+    
+    def record(self, branch, commit_sha, tree_sha, staged, counts, duration, report_path):
+        if self.conn is None:
+            self.connect()
+        
+        with self.conn:
+            self.conn.execute(
+                """INSERT INTO reviews (branch, commit_sha, tree_sha, staged, reviewed_at, critical, medium, minor,
+                                        approved, duration, report_path)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (branch, commit_sha, tree_sha, int(staged), time.time(), counts["critical"], counts["medium"],
+                 counts["minor"], int(counts["critical"] == 0), duration, str(Path(report_path).resolve()))
+            )
+    
+    def latest_for_revision(self, commit_sha, tree_sha=None):
+        if self.conn is None:
+            self.connect()
+        
+        # コミット自体のレビューと、同じ内容（tree）をコミット前にレビューした結果のうち最新のもの
+        return self.conn.execute(
+            "SELECT * FROM reviews WHERE commit_sha = ? OR tree_sha = ? ORDER BY id DESC LIMIT 1",
+            (commit_sha, tree_sha)
+        ).fetchone()
+    
+    def latest_for_branch(self, branch):
+        if self.conn is None:
+            self.connect()
+        
+        return self.conn.execute(
+            "SELECT * FROM reviews WHERE branch = ? ORDER BY id DESC LIMIT 1", (branch,)
+        ).fetchone()
+    
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+
+def describe(review):
+    status = "✅ APPROVED" if review["approved"] else "❌ NOT APPROVED"
+    reviewed_at = datetime.fromtimestamp(review["reviewed_at"]).strftime("%Y-%m-%d %H:%M:%S")
+    return (f"{status} - Critical {review['critical']} / Medium {review['medium']} / Minor {review['minor']}"
+            f" ({review['branch']}, {reviewed_at}, {review['duration']:.1f}s)\n  {review['report_path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記録済みのレビュー結果を照会します")
+    parser.add_argument("command", choices=["status", "report"],
+                        help="status: コミットの最新レビューの承認状態 / report: ブランチの最新レポートのパス")
+    parser.add_argument("--commit", default="HEAD", help="status で照会するコミット（デフォルト: HEAD）")
+    parser.add_argument("--tree", help="status でコミットの代わりに tree（git write-tree の結果）で照会する")
+    parser.add_argument("--branch", help="report で照会するブランチ名（code_reviewer.py に渡した名前）")
+    parser.add_argument("--history-dir", help="レビュー履歴の保存先（デフォルト: git common dir/code-review-cache）")
+    args = parser.parse_args()
+    
+    history = ReviewHistory(args.history_dir)
+    try:
+        if args.command == "report":
+            if not args.branch:
+                parser.error("report には --branch が必要です")
+            review = history.latest_for_branch(args.branch)
+            if review is None or not os.path.exists(review["report_path"]):
+                sys.exit(EXIT_NOT_FOUND)
+            print(review["report_path"])
+            return
+        
+        if args.tree:
+            commit_sha, tree_sha = None, args.tree
+        else:
+            commit_sha, tree_sha = resolve_revision(args.commit)
+            if commit_sha is None:
+                print(f"⚠️ コミットを解決できません: {args.commit}")
+                sys.exit(EXIT_NOT_FOUND)
+        review = history.latest_for_revision(commit_sha, tree_sha)
+    except sqlite3.Error as e:
+        print(f"⚠️ レビュー履歴を読み込めません: {e}")
+        sys.exit(EXIT_NOT_FOUND)
+    finally:
+        history.close()
+    
+    if review is None:
+        print(f"レビュー記録なし: {(commit_sha or tree_sha)[:12]}")
+        sys.exit(EXIT_NOT_FOUND)
+    print(describe(review))
+    sys.exit(EXIT_APPROVED if review["approved"] else EXIT_NOT_APPROVED)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def profile_phase(profiler, name):
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+
+class ReviewProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.rules = {}
+    
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stats["seconds"] += time.perf_counter() - start
+            stats["calls"] += 1
+    
+    def record_rule(self, rule, seconds, matches):
+        stats = self.rules.setdefault(rule["id"], {
+            "category": rule["category"],
+            "seconds": 0.0,
+            "evaluations": 0,
+            "matches": 0
+        })
+        stats["seconds"] += seconds
+        stats["evaluations"] += 1
+        stats["matches"] += matches
+    
+    def category_totals(self):
+        # カテゴリ別の合計（旧 _check_* メソッド単位のフェーズに相当）
+        totals = {}
+        for stats in self.rules.values():
+            category = totals.setdefault(stats["category"], {"seconds": 0.0, "matches": 0})
+            category["seconds"] += stats["seconds"]
+            category["matches"] += stats["matches"]
+        return totals
+    
+    def to_dict(self):
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "phases": self.phases,
+            "categories": self.category_totals(),
+            "rules": self.rules
+        }
+    
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+    
+    def render_markdown(self):
+        lines = [
+            "## Profile",
+            "",
+            f"Wall Time: {(time.perf_counter() - self.started) * 1000:.1f} ms",
+            "",
+            "| Phase | Time (ms) | Calls |",
+            "|---|---:|---:|"
+        ]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"| {name} | {stats['seconds'] * 1000:.2f} | {stats['calls']} |")
+        
+        lines += ["", "| Category | Time (ms) | Matches |", "|---|---:|---:|"]
+        for name, stats in sorted(self.category_totals().items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"| {name} | {stats['seconds'] * 1000:.2f} | {stats['matches']} |")
+        
+        lines += ["", "| Rule | Category | Time (ms) | Evaluations | Matches |", "|---|---|---:|---:|---:|"]
+        for rule_id, stats in sorted(self.rules.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(
+                f"| {rule_id} | {stats['category']} | {stats['seconds'] * 1000:.2f} "
+                f"| {stats['evaluations']} | {stats['matches']} |"
+            )
+        
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import json
+import argparse
+import traceback
+import socketserver
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+
+from code_reviewer import build_parser, parse_args, create_agent, execute
+from review_cache import ReviewCache, default_cache_dir
+from review_client import FORWARDED_ENV_PREFIXES, default_socket_path, send_request
+
+REVIEW_DIR = Path(__file__).resolve().parent
+
+
+def _source_mtimes():
+    return {path.name: path.stat().st_mtime for path in REVIEW_DIR.glob("*.py")}
+
+
+class ReviewRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            response = {"status": "error", "message": "invalid request"}
+        else:
+            response = self.server.dispatch(request)
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+
+
+class ReviewServer(socketserver.UnixStreamServer):
+    # リクエストごとに cwd・環境変数・標準出力を切り替えるため、1件ずつ逐次処理する
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.caches = {}
+        self.source_mtimes = _source_mtimes()
+        self.running = True
+        self.review_count = 0
+        
+        # ソケットは所有ユーザーのみ接続可能にする
+        previous_umask = os.umask(0o077)
+        try:
+            super().__init__(socket_path, ReviewRequestHandler)
+        finally:
+            os.umask(previous_umask)
+    
+    def serve(self):
+        while self.running:
+            self.handle_request()
+    
+    def dispatch(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return {"status": "ok", "pid": os.getpid(), "reviews": self.review_count,
+                    "caches": [str(path) for path in self.caches]}
+        if command == "shutdown":
+            self.running = False
+            return {"status": "ok"}
+        if command == "review":
+            if _source_mtimes() != self.source_mtimes:
+                # レビューのコードが更新されたら古いルールで応答せず終了する（クライアントはプロセス内で再実行）
+                print("🔄 review/*.py の変更を検出したため終了します")
+                self.running = False
+                return {"status": "stale"}
+            return self._review(request)
+        return {"status": "error", "message": f"unknown command: {command}"}
+    
+    def _review(self, request):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        previous_cwd = os.getcwd()
+        previous_env = dict(os.environ)
+        exit_code = 0
+        try:
+            os.chdir(request["cwd"])
+            for key in [key for key in os.environ if key.startswith(FORWARDED_ENV_PREFIXES)]:
+                del os.environ[key]
+            os.environ.update(request.get("env", {}))
+            
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    parser = build_parser()
+                    parser.prog = "code_reviewer.py"
+                    args = parse_args(parser, request.get("argv", []))
+                    if args.watch or args.full_repo:
+                        # 常駐する監視・リポジトリ全体の監査はサーバーを占有し、その間フックのレビューが待たされるため
+                        # 受け付けない（review_client.py はプロセス内で実行する）
+                        parser.error("--watch・--full-repo はレビューサーバーでは実行できません")
+                    cache = None if args.no_cache else self._get_cache(args.cache_dir)
+                    execute(args, create_agent(args, cache))
+                except SystemExit as e:
+                    if isinstance(e.code, int) or e.code is None:
+                        exit_code = e.code or 0
+                    else:
+                        print(e.code, file=sys.stderr)
+                        exit_code = 1
+        except Exception:
+            print(f"❌ レビュー中にエラーが発生しました: {request.get('cwd')}")
+            traceback.print_exc()
+            return {"status": "error", "message": traceback.format_exc()}
+        finally:
+            os.chdir(previous_cwd)
+            os.environ.clear()
+            os.environ.update(previous_env)
+        
+        self.review_count += 1
+        return {"status": "ok", "exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+    
+    def _get_cache(self, cache_dir):
+        # キャッシュは git common dir ごとに接続を保持し、リクエスト間で再利用する
+        cache_dir = Path(cache_dir or default_cache_dir()).resolve()
+        if cache_dir not in self.caches:
+            self.caches[cache_dir] = ReviewCache(cache_dir)
+        return self.caches[cache_dir]
+    
+    def server_close(self):
+        super().server_close()
+        for cache in self.caches.values():
+            cache.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _ping(socket_path):
+    try:
+        return send_request({"command": "ping"}, socket_path)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ルールとレビュー結果を保持する常駐レビューサーバー")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve", "status", "stop"])
+    parser.add_argument("--socket", help="Unixドメインソケットのパス（デフォルト: $CODE_REVIEW_SOCKET または一時ディレクトリ）")
+    args = parser.parse_args()
+    
+    socket_path = args.socket or default_socket_path()
+    status = _ping(socket_path)
+    
+    if args.command == "status":
+        if status is None:
+            print(f"⏹️ レビューサーバーは起動していません: {socket_path}")
+            sys.exit(1)
+        print(f"✅ レビューサーバー稼働中: {socket_path} (pid {status['pid']}, {status['reviews']}件処理)")
+        return
+    
+    if args.command == "stop":
+        if status is None:
+            print(f"⏹️ レビューサーバーは起動していません: {socket_path}")
+            return
+        send_request({"command": "shutdown"}, socket_path)
+        print(f"✅ レビューサーバーを停止しました (pid {status['pid']})")
+        return
+    
+    if status is not None:
+        print(f"⚠️ レビューサーバーは既に起動しています: {socket_path} (pid {status['pid']})")
+        sys.exit(1)
+    if os.path.exists(socket_path):
+        # 前回異常終了したサーバーのソケットファイルを削除する
+        os.unlink(socket_path)
+    
+    server = ReviewServer(socket_path)
+    print(f"🛰️ レビューサーバー起動: {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print("⏹️ レビューサーバーを停止しました")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import mmap
+
+DEFAULT_MAX_FILE_SIZE = 5 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+MINIFIED_SNIFF_BYTES = 65536
+MINIFIED_MIN_BYTES = 4096
+MINIFIED_AVG_LINE_LENGTH = 300
+MINIFIED_EXTENSIONS = ('.js', '.css', '.html')
+MINIFIED_SUFFIXES = ('.min.js', '.min.css', '.bundle.js')
+
+
+def read_source(file_path, max_file_size=DEFAULT_MAX_FILE_SIZE):
+    # 戻り値: (本文, スキップ理由)。スキップ時は本文が None
+    size = os.path.getsize(file_path)
+    if max_file_size and size > max_file_size:
+        return None, f"サイズ上限超過 ({size:,} bytes > {max_file_size:,} bytes)"
+    if size == 0:
+        return "", None
+    
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return decode_source(file_path, buffer)
+
+
+def decode_source(file_path, buffer):
+    skip_reason = detect_unreviewable(file_path, buffer)
+    if skip_reason:
+        return None, skip_reason
+    
+    # mmap から直接デコードし、中間の bytes コピーを作らない（本文の str はファイル全体の大きさになる）
+    with memoryview(buffer) as view:
+        text = str(view, 'utf-8')
+    
+    # open() の universal newlines と同じ改行の正規化を行う
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text, None
+
+
+def detect_unreviewable(file_path, buffer):
+    if b'\0' in buffer[:BINARY_SNIFF_BYTES]:
+        return "バイナリファイル"
+    
+    if file_path.endswith(MINIFIED_SUFFIXES):
+        return "minifyされたファイル"
+    
+    if file_path.endswith(MINIFIED_EXTENSIONS):
+        sample = buffer[:MINIFIED_SNIFF_BYTES]
+        if len(sample) >= MINIFIED_MIN_BYTES and len(sample) / (sample.count(b'\n') + 1) > MINIFIED_AVG_LINE_LENGTH:
+            return "minifyされたファイル"
+    
+    return None
@@ -38,6 +38,7 @@ Commands:
     start <feature-name>              機能開発開始
     review <feature-name>             コードレビュー開始
     ui-test <feature-name> <url>      UI検証開始
+    run <feature-name> [url]          レビューとUI検証を同時に実行
     feedback <feature-name>           フィードバック確認
     merge <feature-name>              developにマージ
 
@@ -45,6 +46,7 @@ Examples:
     $0 start user-authentication
     $0 review user-authentication
     $0 ui-test user-authentication https://my-app.run.app
+    $0 run user-authentication https://my-app.run.app
     $0 feedback user-authentication
     $0 merge user-authentication
 EOF
@@ -101,7 +103,7 @@ cmd_review() {
     
     if [ -f "review/code_reviewer.py" ]; then
         log_info "コードレビュー実行中..."
-        python3 review/code_reviewer.py "$feature_name"
+        python3 review/review_client.py "$feature_name"
     else
         log_warning "code_reviewer.pyが見つかりません"
         log_info "Claude Codeでレビューworktreeを開いてcode-reviewerサブエージェントを起動してください"
@@ -146,6 +148,18 @@ cmd_ui_test() {
     fi
 }
 
+cmd_run() {
+    local feature_name="$1"
+    
+    if [ -z "$feature_name" ]; then
+        log_error "Feature name is required"
+        show_usage
+        exit 1
+    fi
+    
+    python3 "$SCRIPT_DIR/parallel_flow.py" "$@"
+}
+
 cmd_feedback() {
     local feature_name="$1"
     
@@ -160,9 +174,8 @@ cmd_feedback() {
     local review_report=""
     local ui_report=""
     
-    if [ -d "$REVIEW_WORKTREE/review-reports" ]; then
-        review_report=$(find "$REVIEW_WORKTREE/review-reports" -name "review-$feature_name-*.md" | head -1)
-    fi
+    # レビュー履歴は全worktreeで共有される git common dir にあるため、メインworktreeから最新のレポートを引ける
+    review_report=$(cd "$MAIN_WORKTREE" && python3 "$MAIN_WORKTREE/review/review_history.py" report --branch "$feature_name" 2>/dev/null || true)
     
     if [ -d "$UI_TEST_WORKTREE/screenshots" ]; then
         ui_report=$(find "$UI_TEST_WORKTREE/screenshots" -name "ui-verification-$feature_name-*.md" | head -1)
@@ -250,6 +263,9 @@ main() {
         ui-test)
             cmd_ui_test "$@"
             ;;
+        run)
+            cmd_run "$@"
+            ;;
         feedback)
             cmd_feedback "$@"
             ;;
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "review"))
+
+from review_cache import default_cache_dir
+from review_history import ReviewHistory
+
+# これらを指定しない ui_verifier.py は手動確認用のテンプレートを出力するだけで、何も検証しない
+AUTOMATED_UI_OPTIONS = ("--matrix", "--compare")
+
+
+class ParallelDevOrchestrator:
+    def __init__(self, feature_name, url=None, project_root=PROJECT_ROOT, ui_args=None):
+        self.feature_name = feature_name
+        self.url = url
+        self.ui_args = ui_args or []
+        self.main_worktree = Path(project_root)
+        self.review_worktree = Path(f"{project_root}-review")
+        self.ui_test_worktree = Path(f"{project_root}-ui-test")
+        # worktree の追加・ブランチ作成は同じリポジトリのロックを取り合うため直列化する
+        self.git_lock = asyncio.Lock()
+        self.results = {}
+    
+    async def run(self):
+        print(f"🚀 並列フローを開始: {self.feature_name}")
+        steps = [self._run_review()]
+        if self.url:
+            steps.append(self._run_ui_test())
+        else:
+            self.results["ui-test"] = {"status": "skipped", "detail": "URL未指定"}
+        
+        await asyncio.gather(*steps)
+        self._print_summary()
+        return all(result["status"] in ("passed", "skipped", "manual") for result in self.results.values())
+    
+    async def _run_review(self):
+        start = time.perf_counter()
+        started_at = time.time()
+        worktree = self.review_worktree
+        if not await self._prepare_worktree("review", worktree, f"review/{self.feature_name}"):
+            self.results["review"] = {"status": "error", "detail": "レビュー用worktreeの準備に失敗"}
+            return
+        if not (worktree / "review" / "code_reviewer.py").exists():
+            self.results["review"] = {"status": "skipped", "detail": "code_reviewer.pyが見つかりません"}
+            return
+        
+        exit_code = await self._stream("review", worktree, sys.executable, "review/review_client.py", self.feature_name)
+        self.results["review"] = self._review_result(exit_code, started_at)
+        self.results["review"]["seconds"] = time.perf_counter() - start
+    
+    async def _run_ui_test(self):
+        start = time.perf_counter()
+        worktree = self.ui_test_worktree
+        if not await self._prepare_worktree("ui-test", worktree, f"ui-test/{self.feature_name}"):
+            self.results["ui-test"] = {"status": "error", "detail": "UI検証用worktreeの準備に失敗"}
+            return
+        if not (worktree / "ui-test" / "ui_verifier.py").exists():
+            self.results["ui-test"] = {"status": "skipped", "detail": "ui_verifier.pyが見つかりません"}
+            return
+        
+        exit_code = await self._stream("ui-test", worktree, sys.executable, "ui-test/ui_verifier.py",
+                                       self.feature_name, self.url, *self.ui_args)
+        reports = sorted((worktree / "screenshots").glob(f"ui-verification-{self.feature_name}-*.md"))
+        if exit_code != 0:
+            status, detail = "failed", f"exit code {exit_code}"
+        elif not _is_automated_ui_check(self.ui_args):
+            status, detail = "manual", "手動確認用テンプレートを出力（未検証。--ui-arg=--matrix 等で自動検証）"
+        else:
+            status, detail = "passed", f"exit code {exit_code}"
+        self.results["ui-test"] = {
+            "status": status,
+            "detail": detail,
+            "report": str(reports[-1]) if reports else None,
+            "seconds": time.perf_counter() - start
+        }
+    
+    async def _prepare_worktree(self, label, worktree, branch):
+        async with self.git_lock:
+            if not worktree.exists():
+                print(f"[{label}] worktreeを作成中: {worktree}")
+                if await self._git(label, self.main_worktree, "worktree", "add", "--detach", str(worktree), "develop") != 0:
+                    return False
+            
+            # origin/feature/* があれば優先する
+            source = f"origin/feature/{self.feature_name}"
+            if await self._git(None, worktree, "rev-parse", "--verify", "--quiet", source) != 0:
+                source = f"feature/{self.feature_name}"
+            if await self._git(None, worktree, "rev-parse", "--verify", "--quiet", f"refs/heads/{branch}") != 0:
+                if await self._git(label, worktree, "checkout", "-b", branch, source) != 0:
+                    return False
+            else:
+                # 既存のブランチには自動修正・レビューのコミットが載っている場合があるため、リセットせず早送りだけする
+                if await self._git(label, worktree, "checkout", branch) != 0:
+                    return False
+                if await self._git(label, worktree, "merge", "--ff-only", source) != 0:
+                    print(f"[{label}] ❌ {branch} が {source} から分岐しています。手動でマージ・リベースしてください")
+                    return False
+        print(f"[{label}] ✅ ブランチ準備完了: {branch}")
+        return True
+    
+    async def _git(self, label, cwd, *args):
+        if label is None:
+            process = await asyncio.create_subprocess_exec(
+                "git", *args, cwd=cwd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            return await process.wait()
+        return await self._stream(label, cwd, "git", *args)
+    
+    async def _stream(self, label, cwd, *command):
+        # 両ステップの出力を行単位でプレフィックス付きで流す
+        process = await asyncio.create_subprocess_exec(
+            *command, cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
+        )
+        async for line in process.stdout:
+            print(f"[{label}] {line.decode('utf-8', 'replace').rstrip()}", flush=True)
+        return await process.wait()
+    
+    def _review_result(self, exit_code, started_at):
+        # ファイル名の検索では以前のレポートを拾いうるため、レビュー履歴から今回のレビューの記録を引く
+        history = ReviewHistory(default_cache_dir(self.review_worktree))
+        try:
+            review = history.latest_for_branch(self.feature_name)
+        except sqlite3.Error:
+            review = None
+        finally:
+            history.close()
+        
+        if exit_code != 0 or review is None or review["reviewed_at"] < started_at:
+            return {"status": "error", "detail": f"exit code {exit_code}（今回のレビュー記録なし）", "report": None}
+        
+        counts = {severity: review[severity] for severity in ("critical", "medium", "minor")}
+        return {
+            "status": "passed" if review["approved"] else "failed",
+            "detail": f"Critical {counts['critical']} / Medium {counts['medium']} / Minor {counts['minor']}",
+            "report": review["report_path"],
+            "counts": counts
+        }
+    
+    def _print_summary(self):
+        icons = {"passed": "✅", "failed": "❌", "error": "❌", "skipped": "⏭️", "manual": "📝"}
+        print(f"\n📋 並列フロー結果: {self.feature_name}")
+        for name in ("review", "ui-test"):
+            result = self.results[name]
+            seconds = f" ({result['seconds']:.1f}s)" if "seconds" in result else ""
+            print(f"  {icons[result['status']]} {name}: {result['status']} - {result['detail']}{seconds}")
+            if result.get("report"):
+                print(f"     レポート: {result['report']}")
+    
+    def write_status(self, path):
+        status = {
+            "feature": self.feature_name,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "results": self.results
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(status, f, ensure_ascii=False, indent=2)
+
+
+def _is_automated_ui_check(ui_args):
+    # argparse の省略形（--mat 等）も同じオプションとして扱う
+    for arg in ui_args:
+        name = arg.split("=", 1)[0]
+        if len(name) > 2 and name.startswith("--") and any(option.startswith(name) for option in AUTOMATED_UI_OPTIONS):
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="レビューとUI検証を各worktreeで同時に実行し、結果をまとめて表示します")
+    parser.add_argument("feature_name", metavar="feature-name")
+    parser.add_argument("url", nargs="?", help="UI検証の対象URL（省略時はレビューのみ）")
+    parser.add_argument("--output", help="集約した結果をJSONで保存する")
+    parser.add_argument("--ui-arg", action="append", default=[], help="ui_verifier.py に渡す追加引数（複数指定可）")
+    args = parser.parse_args()
+    
+    orchestrator = ParallelDevOrchestrator(args.feature_name, args.url, ui_args=args.ui_arg)
+    success = asyncio.run(orchestrator.run())
+    
+    if args.output:
+        orchestrator.write_status(args.output)
+        print(f"\n📝 結果を保存しました: {args.output}")
+    
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
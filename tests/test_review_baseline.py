@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "review"))
+
+from code_reviewer import BASELINE_RULE_ENGINE, CodeReviewAgent
+from review_baseline import ReviewBaseline
+
+
+def _review(files, baseline=None):
+    agent = CodeReviewAgent("test", files, rule_engine=BASELINE_RULE_ENGINE, baseline=baseline)
+    agent.run_review()
+    return agent
+
+
+def test_second_occurrence_in_baselined_file_is_reported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("a.py").write_text('def run(value):\n    return eval(value)\n', encoding='utf-8')
+    
+    agent = _review(["a.py"])
+    baseline = ReviewBaseline(tmp_path / ".review-baseline.json")
+    baseline.write(finding for findings in agent.findings.values() for finding in findings)
+    assert len(_review(["a.py"], ReviewBaseline(baseline.path).load()).findings["critical"]) == 0
+    
+    with open("a.py", "a", encoding='utf-8') as f:
+        f.write('x = eval("2")\n')
+    critical = list(_review(["a.py"], ReviewBaseline(baseline.path).load()).findings["critical"])
+    assert [(finding.rule, finding.line) for finding in critical] == [("eval-usage", 3)]
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+import codecs
+import asyncio
+import threading
+import http.client
+import http.server
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_VIEWPORTS = [(375, 667), (768, 1024), (1280, 720), (1920, 1080)]
+# これより狭いビューポートはモバイル端末として取得する
+MOBILE_MAX_WIDTH = 768
+DESKTOP_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) ui-verifier/1.0"
+MOBILE_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile ui-verifier/1.0"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# HTMLに含まれていればコンソールエラー・サーバーエラーの痕跡とみなす文字列
+CONSOLE_ERROR_MARKERS = (
+    "Uncaught ",
+    "TypeError:",
+    "ReferenceError:",
+    "SyntaxError:",
+    "console.error(",
+    "Failed to load resource",
+    "Traceback (most recent call last)",
+    "Internal Server Error",
+)
+
+
+class _PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+        self.has_viewport_meta = False
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("script", "img") and attrs.get("src"):
+            self.assets.append(attrs["src"])
+        elif tag == "link" and "stylesheet" in (attrs.get("rel") or "").lower() and attrs.get("href"):
+            self.assets.append(attrs["href"])
+        elif tag == "meta" and (attrs.get("name") or "").lower() == "viewport":
+            self.has_viewport_meta = True
+
+
+class HttpConnectionPool:
+    # http.client の接続をホストごとに保持して使い回し、通信はスレッドで実行する
+    def __init__(self, max_connections=16, timeout=10.0):
+        self.semaphore = asyncio.Semaphore(max_connections)
+        self.timeout = timeout
+        self.idle = {}
+    
+    async def get(self, url, headers=None):
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body, elapsed = await self._request(url, headers or {})
+            location = response_headers.get("location")
+            # http(s) 以外へのリダイレクトは追わず、リダイレクトのステータスのまま返す
+            if status not in REDIRECT_STATUSES or not location or not is_http_url(urljoin(url, location)):
+                break
+            url = urljoin(url, location)
+        return {"url": url, "status": status, "headers": response_headers, "body": body, "elapsed": elapsed}
+    
+    async def _request(self, url, headers):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        
+        async with self.semaphore:
+            connection, reused = self._acquire(key)
+            try:
+                result = await asyncio.to_thread(self._send, connection, path, headers)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if not reused:
+                    raise
+                # 再利用した接続がサーバー側で閉じられていた場合は新しい接続で1回だけ再試行する
+                connection, _ = self._acquire(key, fresh=True)
+                try:
+                    result = await asyncio.to_thread(self._send, connection, path, headers)
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    raise
+            
+            status, response_headers, body, elapsed, will_close = result
+            if will_close:
+                connection.close()
+            else:
+                self.idle.setdefault(key, []).append(connection)
+            return status, response_headers, body, elapsed
+    
+    def _acquire(self, key, fresh=False):
+        idle = self.idle.get(key)
+        if idle and not fresh:
+            return idle.pop(), True
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+    
+    @staticmethod
+    def _send(connection, path, headers):
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        elapsed = time.perf_counter() - start
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        return response.status, response_headers, body, elapsed, response.will_close
+    
+    def close(self):
+        for connections in self.idle.values():
+            for connection in connections:
+                connection.close()
+        self.idle.clear()
+
+
+class PageChecker:
+    def __init__(self, concurrency=16, timeout=10.0, max_response_ms=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_response_ms = max_response_ms
+        self.pool = None
+        self.asset_checks = {}
+    
+    async def check_matrix(self, urls, viewports):
+        # 同時接続数ぶんの通信スレッドを用意する（既定のスレッドプールはCPU数で上限が決まるため）
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        self.pool = HttpConnectionPool(self.concurrency, self.timeout)
+        try:
+            # 結果は urls × viewports の順序で返す
+            return await asyncio.gather(*[
+                self.check_page(url, viewport) for url in urls for viewport in viewports
+            ])
+        finally:
+            self.pool.close()
+    
+    async def check_page(self, url, viewport):
+        width, height = viewport
+        result = {
+            "url": url,
+            "viewport": f"{width}x{height}",
+            "status": None,
+            "elapsed_ms": None,
+            "missing_assets": [],
+            "console_errors": [],
+            "warnings": [],
+            "error": None
+        }
+        
+        headers = {
+            "User-Agent": MOBILE_USER_AGENT if width < MOBILE_MAX_WIDTH else DESKTOP_USER_AGENT,
+            "Viewport-Width": str(width),
+            "Sec-CH-Viewport-Width": str(width),
+            "Sec-CH-Viewport-Height": str(height)
+        }
+        try:
+            response = await self.pool.get(url, headers)
+        except (OSError, http.client.HTTPException) as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            result["passed"] = False
+            return result
+        
+        result["status"] = response["status"]
+        result["elapsed_ms"] = round(response["elapsed"] * 1000, 1)
+        html = response["body"].decode(self._charset(response["headers"]), "replace")
+        
+        parser = _PageParser()
+        try:
+            parser.feed(html)
+        except Exception as e:
+            result["warnings"].append(f"HTMLの解析に失敗: {e}")
+        if width < MOBILE_MAX_WIDTH and not parser.has_viewport_meta:
+            result["warnings"].append('<meta name="viewport"> がありません')
+        
+        result["console_errors"] = [marker.strip() for marker in CONSOLE_ERROR_MARKERS if marker in html]
+        
+        asset_urls = []
+        for asset in parser.assets:
+            asset_url = urljoin(response["url"], asset)
+            if is_http_url(asset_url) and asset_url not in asset_urls:
+                asset_urls.append(asset_url)
+        for asset_url, problem in zip(asset_urls, await asyncio.gather(*map(self._check_asset, asset_urls))):
+            if problem:
+                result["missing_assets"].append(f"{asset_url} ({problem})")
+        
+        if self.max_response_ms is not None and result["elapsed_ms"] > self.max_response_ms:
+            result["warnings"].append(f"応答時間が上限を超えています（{result['elapsed_ms']} ms > {self.max_response_ms} ms）")
+        
+        result["passed"] = (
+            200 <= result["status"] < 300
+            and not result["missing_assets"]
+            and not result["console_errors"]
+            and (self.max_response_ms is None or result["elapsed_ms"] <= self.max_response_ms)
+        )
+        return result
+    
+    def _check_asset(self, asset_url):
+        # 同じアセットを参照するページ・ビューポート間で取得は1回にまとめる
+        if asset_url not in self.asset_checks:
+            self.asset_checks[asset_url] = asyncio.ensure_future(self._fetch_asset(asset_url))
+        return self.asset_checks[asset_url]
+    
+    async def _fetch_asset(self, asset_url):
+        try:
+            response = await self.pool.get(asset_url)
+        except (OSError, http.client.HTTPException) as e:
+            return type(e).__name__
+        if response["status"] >= 400:
+            return f"HTTP {response['status']}"
+        return None
+    
+    @staticmethod
+    def _charset(headers):
+        content_type = headers.get("content-type", "")
+        for part in content_type.split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                try:
+                    return codecs.lookup(value.strip('"')).name
+                except LookupError:
+                    break
+        return "utf-8"
+
+
+class _QuietRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # keep-alive を有効にして接続プールの再利用を検証できるようにする
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def start_local_server(directory, host="127.0.0.1", port=0):
+    # デプロイ前のビルド成果物を検証するためのローカルサーバー（バックグラウンドスレッドで起動）
+    server = http.server.ThreadingHTTPServer((host, port), partial(_QuietRequestHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+def is_http_url(url):
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.hostname)
+
+
+def parse_viewport(value):
+    width, separator, height = value.lower().partition("x")
+    if not separator or not width.isdigit() or not height.isdigit():
+        raise ValueError(f"viewport must be WIDTHxHEIGHT: {value}")
+    return int(width), int(height)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import re
+import json
+import zlib
+import shutil
+import struct
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+DEFAULT_BASELINE_DIR = Path("screenshots") / "baselines"
+
+# 画素ごとの差（RGB最大差）がこれを超えたら変化した画素とみなす（圧縮ノイズ・アンチエイリアス対策）
+DEFAULT_PIXEL_THRESHOLD = 16
+# 変化した画素の割合（画像全体・領域ごと）がこれを超えたら FAIL
+DEFAULT_THRESHOLD = 0.01
+DEFAULT_REGION_THRESHOLD = 0.10
+DEFAULT_REGION_SIZE = 32
+
+
+def require_numpy():
+    if numpy is None:
+        raise RuntimeError("スクリーンショット比較には NumPy が必要です（pip install numpy）")
+
+
+def require_pillow():
+    # 純Pythonでの PNG デコード（Average / Paeth フィルタは1バイトずつの処理になる）は大きなスクリーンショットで遅すぎるため使わない
+    if Image is None:
+        raise RuntimeError("スクリーンショット比較には Pillow が必要です（pip install pillow）")
+
+
+def load_image(path):
+    require_numpy()
+    require_pillow()
+    with Image.open(path) as image:
+        return numpy.asarray(image.convert("RGB"))
+
+
+def write_png(path, image):
+    height, width, _ = image.shape
+    scanlines = numpy.empty((height, width * 3 + 1), dtype=numpy.uint8)
+    scanlines[:, 0] = 0
+    scanlines[:, 1:] = image.reshape(height, -1)
+    
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+    
+    with open(path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def compare_images(actual, baseline, pixel_threshold=DEFAULT_PIXEL_THRESHOLD, region_size=DEFAULT_REGION_SIZE):
+    require_numpy()
+    if actual.shape != baseline.shape:
+        return {
+            "size_mismatch": True,
+            "changed_ratio": 1.0,
+            "max_region_ratio": 1.0,
+            "changed_regions": [],
+            "heatmap": None
+        }
+    
+    # 画素ごとの差はRGBのうち最大の差で評価する
+    diff = numpy.abs(actual.astype(numpy.int16) - baseline.astype(numpy.int16)).max(axis=2)
+    changed = diff > pixel_threshold
+    
+    # 領域ごとの変化率（端数は変化なしとしてパディングしてから region_size 四方に分割）
+    height, width = changed.shape
+    rows = -(-height // region_size)
+    columns = -(-width // region_size)
+    padded = numpy.zeros((rows * region_size, columns * region_size), dtype=numpy.float32)
+    padded[:height, :width] = changed
+    region_ratio = padded.reshape(rows, region_size, columns, region_size).mean(axis=(1, 3))
+    
+    changed_regions = [
+        {"x": int(column * region_size), "y": int(row * region_size), "ratio": round(float(region_ratio[row, column]), 4)}
+        for row, column in zip(*numpy.nonzero(region_ratio))
+    ]
+    changed_regions.sort(key=lambda region: -region["ratio"])
+    
+    return {
+        "size_mismatch": False,
+        "changed_ratio": float(changed.mean()),
+        "max_region_ratio": float(region_ratio.max()) if region_ratio.size else 0.0,
+        "changed_regions": changed_regions,
+        "heatmap": render_heatmap(actual, diff)
+    }
+
+
+def render_heatmap(actual, diff):
+    # 元画像を薄いグレーにして、差の大きい画素ほど赤く重ねる
+    gray = actual.mean(axis=2) * 0.35 + 255 * 0.4
+    intensity = diff.astype(numpy.float32) / 255.0
+    heatmap = numpy.empty(actual.shape, dtype=numpy.float32)
+    heatmap[..., 0] = gray + (255 - gray) * intensity
+    heatmap[..., 1] = gray * (1 - intensity)
+    heatmap[..., 2] = gray * (1 - intensity)
+    return heatmap.clip(0, 255).astype(numpy.uint8)
+
+
+class BaselineStore:
+    def __init__(self, root=DEFAULT_BASELINE_DIR):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self.index = self._load_index()
+        self.loaded = {}
+    
+    def _load_index(self):
+        if not self.index_path.exists():
+            return {}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.index_path)
+    
+    def path_for(self, feature_name, viewport, case):
+        return self.root / feature_name / viewport / f"{case}.png"
+    
+    def get(self, feature_name, viewport, case):
+        entry = self.index.get(feature_name, {}).get(viewport, {}).get(case)
+        if entry is None:
+            return None
+        
+        key = (feature_name, viewport, case, entry["sha256"])
+        if key not in self.loaded:
+            # デコード済みの画素を .npy で保持し、同じベースラインの再デコードを避ける
+            cache_path = self._cache_path(feature_name, viewport, case, entry["sha256"])
+            if cache_path.exists():
+                image = numpy.load(cache_path)
+            else:
+                image = load_image(self.path_for(feature_name, viewport, case))
+                numpy.save(cache_path, image)
+            self.loaded[key] = image
+        return self.loaded[key]
+    
+    def save(self, feature_name, viewport, case, screenshot_path):
+        target = self.path_for(feature_name, viewport, case)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(screenshot_path, target)
+        
+        cases = self.index.setdefault(feature_name, {}).setdefault(viewport, {})
+        previous = cases.get(case)
+        if previous is not None:
+            stale_cache = self._cache_path(feature_name, viewport, case, previous["sha256"])
+            if stale_cache.exists():
+                stale_cache.unlink()
+        
+        with open(target, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        cases[case] = {
+            "path": target.relative_to(self.root).as_posix(),
+            "sha256": digest,
+            "updated": datetime.now().isoformat(timespec="seconds")
+        }
+        self._save_index()
+        return target
+    
+    def _cache_path(self, feature_name, viewport, case, digest):
+        return self.root / feature_name / viewport / f"{case}.{digest[:16]}.npy"
+
+
+def case_name(screenshot_path):
+    # Playwright のスクリーンショット名に付くタイムスタンプを除いてテストケース名にする
+    return re.sub(r'[-_]\d{4}-?\d{2}-?\d{2}(?:T[\d\-:.]*Z?)?$', '', Path(screenshot_path).stem)
+
+
+def viewport_of(image):
+    height, width = image.shape[:2]
+    return f"{width}x{height}"
@@ -2,10 +2,16 @@
 import os
 import sys
 import json
+import time
+import asyncio
+import argparse
 from datetime import datetime
 from pathlib import Path
 import subprocess
 
+from page_checker import DEFAULT_VIEWPORTS, PageChecker, is_http_url, parse_viewport, start_local_server
+import screenshot_diff
+
 
 class UIVerificationAgent:
     def __init__(self, feature_name, url, viewport_width=1280, viewport_height=720):
@@ -35,6 +41,215 @@ class UIVerificationAgent:
         self._define_test_cases()
         self._generate_report_template()
         
+    def run_matrix(self, urls, viewports, checker):
+        print(f"🔍 Starting UI matrix verification for: {self.feature_name}")
+        print(f"   URLs: {len(urls)}")
+        print(f"   Viewports: {', '.join(f'{width}x{height}' for width, height in viewports)}")
+        
+        start = time.perf_counter()
+        self.test_results = asyncio.run(checker.check_matrix(urls, viewports))
+        elapsed = time.perf_counter() - start
+        
+        print("")
+        for result in self.test_results:
+            icon = "✅" if result["passed"] else "❌"
+            status = result["status"] if result["error"] is None else result["error"]
+            print(f"   {icon} [{result['viewport']}] {result['url']} - {status}")
+        print(f"\n⏱️ {len(self.test_results)}件を {elapsed:.2f}s で検証しました")
+        
+        self._generate_matrix_report(urls, viewports, elapsed)
+        return all(result["passed"] for result in self.test_results)
+    
+    def _generate_matrix_report(self, urls, viewports, elapsed):
+        report_dir = Path("screenshots")
+        report_dir.mkdir(exist_ok=True)
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        report_path = report_dir / f"ui-verification-{self.feature_name}-{datetime.now().strftime('%Y%m%d')}.md"
+        
+        failures = [result for result in self.test_results if not result["passed"]]
+        approval_status = "✅ APPROVED" if not failures else "❌ NOT APPROVED"
+        
+        report_content = f"""# UI Verification Report: {self.feature_name}
+
+## Test Date
+{timestamp}
+
+## Test Environment
+- URLs: {len(urls)}
+- Viewports: {', '.join(f'{width}x{height}' for width, height in viewports)}
+- Mode: HTTP matrix check (status / response time / assets / console error markers)
+- Duration: {elapsed:.2f}s
+
+## Verification Results
+
+| URL | Viewport | Status | Time (ms) | Missing Assets | Console Errors | Result |
+|---|---|---:|---:|---:|---:|---|
+"""
+        
+        for result in self.test_results:
+            status = result["status"] if result["status"] is not None else "-"
+            elapsed_ms = result["elapsed_ms"] if result["elapsed_ms"] is not None else "-"
+            verdict = "✅ PASS" if result["passed"] else "❌ FAIL"
+            report_content += (
+                f"| {result['url']} | {result['viewport']} | {status} | {elapsed_ms} "
+                f"| {len(result['missing_assets'])} | {len(result['console_errors'])} | {verdict} |\n"
+            )
+        
+        if failures:
+            report_content += "\n### ❌ Failures\n\n"
+            for result in failures:
+                report_content += f"**{result['url']}** - {result['viewport']}\n"
+                if result["error"]:
+                    report_content += f"- 接続エラー: {result['error']}\n"
+                elif not 200 <= result["status"] < 300:
+                    report_content += f"- HTTPステータス: {result['status']}\n"
+                for asset in result["missing_assets"]:
+                    report_content += f"- 欠落アセット: {asset}\n"
+                for marker in result["console_errors"]:
+                    report_content += f"- エラーマーカー: `{marker}`\n"
+                for warning in result["warnings"]:
+                    report_content += f"- 警告: {warning}\n"
+                report_content += "\n"
+        
+        warnings = [result for result in self.test_results if result["passed"] and result["warnings"]]
+        if warnings:
+            report_content += "\n### ⚠️ Warnings\n\n"
+            for result in warnings:
+                for warning in result["warnings"]:
+                    report_content += f"- {result['url']} - {result['viewport']}: {warning}\n"
+        
+        report_content += f"""
+## Approval Status
+{approval_status}
+
+## Next Steps
+"""
+        if failures:
+            report_content += "1. ❌ FAIL のページ・ビューポートを修正してください\n"
+            report_content += "2. レイアウト・スタイルはスクリーンショットで目視確認してください\n"
+        else:
+            report_content += "1. レイアウト・スタイルはスクリーンショットで目視確認してください\n"
+        
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report_content)
+        
+        print(f"\n📊 UI検証レポート作成完了: {report_path}")
+        print(f"   Status: {approval_status}")
+    
+    def run_comparison(self, screenshots, store, threshold=screenshot_diff.DEFAULT_THRESHOLD,
+                       region_threshold=screenshot_diff.DEFAULT_REGION_THRESHOLD,
+                       pixel_threshold=screenshot_diff.DEFAULT_PIXEL_THRESHOLD, update_baseline=False):
+        print(f"🔍 Starting screenshot comparison for: {self.feature_name}")
+        print(f"   Screenshots: {len(screenshots)} / Baselines: {store.root}")
+        
+        diff_dir = Path("screenshots") / "diffs" / self.feature_name
+        # ベースラインは画像の実寸ではなく撮影時に指定したビューポートで引く（実寸が変わったら FAIL にするため）
+        viewport = f"{self.viewport_width}x{self.viewport_height}"
+        start = time.perf_counter()
+        for screenshot in screenshots:
+            image = screenshot_diff.load_image(screenshot)
+            case = screenshot_diff.case_name(screenshot)
+            result = {"screenshot": str(screenshot), "case": case, "viewport": viewport,
+                      "size": screenshot_diff.viewport_of(image), "heatmap": None}
+            
+            baseline = None if update_baseline else store.get(self.feature_name, viewport, case)
+            if baseline is None:
+                # ベースラインがない（または更新指定時）は今回のスクリーンショットを登録して PASS とする
+                store.save(self.feature_name, viewport, case, screenshot)
+                result.update(verdict="BASELINE", passed=True, changed_ratio=0.0, max_region_ratio=0.0)
+            else:
+                comparison = screenshot_diff.compare_images(image, baseline, pixel_threshold)
+                result.update(
+                    changed_ratio=comparison["changed_ratio"],
+                    max_region_ratio=comparison["max_region_ratio"],
+                    changed_regions=comparison["changed_regions"][:5],
+                    size_mismatch=comparison["size_mismatch"],
+                    baseline_size=screenshot_diff.viewport_of(baseline)
+                )
+                result["passed"] = (
+                    not comparison["size_mismatch"]
+                    and comparison["changed_ratio"] <= threshold
+                    and comparison["max_region_ratio"] <= region_threshold
+                )
+                result["verdict"] = "PASS" if result["passed"] else "FAIL"
+                if comparison["heatmap"] is not None and comparison["changed_ratio"] > 0:
+                    heatmap_path = diff_dir / viewport / f"{case}-diff.png"
+                    heatmap_path.parent.mkdir(parents=True, exist_ok=True)
+                    screenshot_diff.write_png(heatmap_path, comparison["heatmap"])
+                    result["heatmap"] = str(heatmap_path)
+            
+            icon = {"PASS": "✅", "FAIL": "❌", "BASELINE": "🆕"}[result["verdict"]]
+            if result.get("size_mismatch"):
+                print(f"   {icon} [{viewport}] {case} - {result['verdict']} "
+                      f"(画像サイズ {result['size']} がベースライン {result['baseline_size']} と異なります)")
+            else:
+                print(f"   {icon} [{viewport}] {case} - {result['verdict']} (変化率 {result['changed_ratio']:.2%})")
+            self.test_results.append(result)
+        
+        elapsed = time.perf_counter() - start
+        print(f"\n⏱️ {len(screenshots)}枚を {elapsed:.2f}s で比較しました")
+        self._generate_comparison_report(threshold, region_threshold)
+        return all(result["passed"] for result in self.test_results)
+    
+    def _generate_comparison_report(self, threshold, region_threshold):
+        report_dir = Path("screenshots")
+        report_dir.mkdir(exist_ok=True)
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        report_path = report_dir / f"ui-verification-{self.feature_name}-{datetime.now().strftime('%Y%m%d')}.md"
+        
+        failures = [result for result in self.test_results if not result["passed"]]
+        approval_status = "✅ APPROVED" if not failures else "❌ NOT APPROVED"
+        
+        report_content = f"""# UI Verification Report: {self.feature_name}
+
+## Test Date
+{timestamp}
+
+## Test Environment
+- Mode: Screenshot baseline comparison
+- Threshold: 変化画素 {threshold:.2%} 以下 / 領域ごと {region_threshold:.0%} 以下
+
+## Verification Results
+
+"""
+        
+        for number, result in enumerate(self.test_results, 1):
+            icon = {"PASS": "✅", "FAIL": "❌", "BASELINE": "🆕"}[result["verdict"]]
+            report_content += f"""### {icon} Test Case {number}: {result['case']} ({result['viewport']})
+![Screenshot]({Path(os.path.relpath(result['screenshot'], report_dir)).as_posix()})
+
+**結果:**
+{result['verdict']}
+
+"""
+            if result["verdict"] == "BASELINE":
+                report_content += "**備考:**\nベースラインとして登録しました\n\n"
+            elif result.get("size_mismatch"):
+                report_content += (f"**備考:**\nベースラインと画像サイズが異なります"
+                                   f"（ベースライン {result['baseline_size']} / 今回 {result['size']}）\n\n")
+            else:
+                report_content += f"**差分:**\n- 変化した画素: {result['changed_ratio']:.2%}\n"
+                report_content += f"- 最大の領域変化率: {result['max_region_ratio']:.2%}\n"
+                for region in result["changed_regions"]:
+                    report_content += f"- 領域 ({region['x']}, {region['y']}): {region['ratio']:.2%}\n"
+                if result["heatmap"]:
+                    heatmap_link = Path(os.path.relpath(result['heatmap'], report_dir)).as_posix()
+                    report_content += f"\n![Diff Heatmap]({heatmap_link})\n"
+                report_content += "\n"
+            report_content += "---\n\n"
+        
+        report_content += f"""## Approval Status
+{approval_status}
+"""
+        
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report_content)
+        
+        print(f"\n📊 UI検証レポート作成完了: {report_path}")
+        print(f"   Status: {approval_status}")
+    
     def _define_test_cases(self):
         print("\n✅ 確認項目:")
         print("   1. 期待される要素が存在するか")
@@ -126,18 +341,81 @@ class UIVerificationAgent:
 
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python ui_verifier.py <feature-name> <url> [width] [height]")
-        print("Example: python ui_verifier.py user-auth https://my-app.run.app 1280 720")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="UI検証を実行してレポートを作成します")
+    parser.add_argument("feature_name", metavar="feature-name")
+    parser.add_argument("targets", nargs="*", metavar="url",
+                        help="検証対象URL（通常モード: <url> [width] [height]、--matrix: 複数URL）")
+    parser.add_argument("--matrix", action="store_true", help="複数URL × ビューポートを並行して自動検証する")
+    parser.add_argument("--viewport", action="append", type=parse_viewport,
+                        help="WIDTHxHEIGHT（複数指定可、デフォルト: 375x667 768x1024 1280x720 1920x1080。"
+                             "--compare では撮影時のビューポートを1つ指定、デフォルト: 1280x720）")
+    parser.add_argument("--url-file", help="検証対象URLを1行1件で記載したファイル")
+    parser.add_argument("--serve", metavar="DIR", help="DIR をローカルサーバーで配信し、相対URLをそのサーバーで検証する")
+    parser.add_argument("--concurrency", type=int, default=16, help="同時接続数（デフォルト: 16）")
+    parser.add_argument("--timeout", type=float, default=10.0, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--max-response-ms", type=float, help="これを超える応答時間を FAIL にする")
+    parser.add_argument("--compare", nargs="+", metavar="PNG", help="スクリーンショットをベースラインと比較して PASS/FAIL を判定する")
+    parser.add_argument("--baseline-dir", default=str(screenshot_diff.DEFAULT_BASELINE_DIR),
+                        help="ベースラインの保存先（デフォルト: screenshots/baselines）")
+    parser.add_argument("--update-baseline", action="store_true", help="--compare のスクリーンショットでベースラインを更新する")
+    parser.add_argument("--threshold", type=float, default=screenshot_diff.DEFAULT_THRESHOLD,
+                        help="FAIL とする変化画素の割合（デフォルト: 0.01）")
+    parser.add_argument("--region-threshold", type=float, default=screenshot_diff.DEFAULT_REGION_THRESHOLD,
+                        help="FAIL とする32px四方の領域内の変化画素の割合（デフォルト: 0.1）")
+    args = parser.parse_intermixed_args()
+    
+    if args.compare:
+        if screenshot_diff.numpy is None or screenshot_diff.Image is None:
+            print("❌ スクリーンショット比較には NumPy と Pillow が必要です: pip install numpy pillow")
+            sys.exit(1)
+        if args.viewport and len(args.viewport) > 1:
+            parser.error("--compare では --viewport を1つだけ指定してください（撮影時のビューポート）")
+        width, height = args.viewport[0] if args.viewport else (1280, 720)
+        agent = UIVerificationAgent(args.feature_name, args.targets[0] if args.targets else "", width, height)
+        store = screenshot_diff.BaselineStore(args.baseline_dir)
+        passed = agent.run_comparison(args.compare, store, args.threshold, args.region_threshold,
+                                      update_baseline=args.update_baseline)
+        sys.exit(0 if passed else 1)
+    
+    if not args.matrix:
+        if not 1 <= len(args.targets) <= 3:
+            parser.error("通常モードは <url> [width] [height] を指定してください")
+        url = args.targets[0]
+        width = int(args.targets[1]) if len(args.targets) > 1 else 1280
+        height = int(args.targets[2]) if len(args.targets) > 2 else 720
+        
+        agent = UIVerificationAgent(args.feature_name, url, width, height)
+        agent.run_verification()
+        return
+    
+    urls = list(args.targets)
+    if args.url_file:
+        with open(args.url_file, 'r', encoding='utf-8') as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    
+    server = None
+    if args.serve:
+        server, base_url = start_local_server(args.serve)
+        print(f"🌐 ローカルサーバー起動: {base_url} ({args.serve})")
+        urls = [url if "://" in url else base_url + url.lstrip("/") for url in (urls or ["/"])]
+    
+    if not urls:
+        parser.error("検証対象URLを指定してください")
+    invalid_urls = [url for url in urls if not is_http_url(url)]
+    if invalid_urls:
+        if server is not None:
+            server.shutdown()
+        parser.error(f"http(s)://ホスト 形式のURLを指定してください（相対URLは --serve と併用）: {', '.join(invalid_urls)}")
     
-    feature_name = sys.argv[1]
-    url = sys.argv[2]
-    width = int(sys.argv[3]) if len(sys.argv) > 3 else 1280
-    height = int(sys.argv[4]) if len(sys.argv) > 4 else 720
+    agent = UIVerificationAgent(args.feature_name, urls[0])
+    checker = PageChecker(args.concurrency, args.timeout, args.max_response_ms)
+    try:
+        passed = agent.run_matrix(urls, args.viewport or DEFAULT_VIEWPORTS, checker)
+    finally:
+        if server is not None:
+            server.shutdown()
     
-    agent = UIVerificationAgent(feature_name, url, width, height)
-    agent.run_verification()
+    sys.exit(0 if passed else 1)
 
 
 if __name__ == "__main__":